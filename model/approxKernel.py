@@ -0,0 +1,119 @@
+import argparse
+import time
+import numpy as np
+from scipy.optimize import minimize_scalar
+from scipy.special import log_softmax, softmax
+from sklearn.base import BaseEstimator, ClassifierMixin, clone, is_classifier
+from sklearn.ensemble import VotingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from features import extractCombinedFeaturesBatch, syntheticLandmarks
+class ApproxKernelClassifier(ClassifierMixin, BaseEstimator):
+  def __init__(self, method='nystroem', nComponents=1000, gamma='scale', alpha=1e-5, batchSize=4096, epochs=5, calibrationFraction=0.1, randomState=42):
+    self.method = method
+    self.nComponents = nComponents
+    self.gamma = gamma
+    self.alpha = alpha
+    self.batchSize = batchSize
+    self.epochs = epochs
+    self.calibrationFraction = calibrationFraction
+    self.randomState = randomState
+  def createFeatureMap(self, x):
+    gamma = 1.0 / (x.shape[1] * x.var()) if self.gamma == 'scale' else self.gamma
+    if self.method == 'nystroem':
+      return Nystroem(gamma=gamma, n_components=min(self.nComponents, len(x)), random_state=self.randomState)
+    if self.method == 'rff':
+      return RBFSampler(gamma=gamma, n_components=self.nComponents, random_state=self.randomState)
+    raise ValueError(f"Unknown Kernel Approximation {self.method}, Expected 'nystroem' Or 'rff'")
+  def fit(self, x, y):
+    x = np.asarray(x, dtype=np.float32)
+    y = np.asarray(y)
+    xFit, xCal, yFit, yCal = train_test_split(
+      x, y, test_size=self.calibrationFraction, random_state=self.randomState, stratify=y
+    )
+    rng = np.random.default_rng(self.randomState)
+    self.classes_ = np.unique(y)
+    self.featureMap_ = self.createFeatureMap(xFit)
+    self.featureMap_.fit(xFit[rng.permutation(len(xFit))[:max(self.nComponents * 10, self.batchSize)]])
+    self.linear_ = SGDClassifier(loss='log_loss', alpha=self.alpha, random_state=self.randomState)
+    for _ in range(self.epochs):
+      order = rng.permutation(len(xFit))
+      for start in range(0, len(order), self.batchSize):
+        batchIdx = order[start:start+self.batchSize]
+        self.linear_.partial_fit(self.featureMap_.transform(xFit[batchIdx]), yFit[batchIdx], classes=self.classes_)
+    self.temperature_ = 1.0
+    logits = self.logits(xCal)
+    targets = np.searchsorted(self.classes_, yCal)
+    def negLogLikelihood(temperature):
+      return -np.mean(log_softmax(logits / temperature, axis=1)[np.arange(len(targets)), targets])
+    self.temperature_ = float(minimize_scalar(negLogLikelihood, bounds=(0.05, 20.0), method='bounded').x)
+    self.n_features_in_ = x.shape[1]
+    return self
+  def logits(self, x):
+    decision = self.linear_.decision_function(self.featureMap_.transform(np.asarray(x, dtype=np.float32)))
+    if decision.ndim == 1:
+      decision = np.column_stack([np.zeros_like(decision), decision])
+    return decision
+  def predict_proba(self, x):
+    return softmax(self.logits(x) / self.temperature_, axis=1)
+  def predict(self, x):
+    return self.classes_[np.argmax(self.logits(x), axis=1)]
+def syntheticFeatureSet(numSamples, numClasses=26, seed=42):
+  rng = np.random.default_rng(seed)
+  prototypes = syntheticLandmarks(numClasses, seed)
+  labels = rng.integers(0, numClasses, numSamples)
+  landmarks = prototypes[labels] + rng.normal(0, 0.03, (numSamples, prototypes.shape[1])).astype(np.float32)
+  return extractCombinedFeaturesBatch(landmarks), labels
+def timeFitPredict(estimator, xTrain, yTrain, xTest, yTest, numLatencySamples=200):
+  start = time.perf_counter()
+  estimator.fit(xTrain, yTrain)
+  fitTime = time.perf_counter() - start
+  start = time.perf_counter()
+  for row in xTest[:numLatencySamples]:
+    estimator.predict_proba(row[None])
+  latencyMs = (time.perf_counter() - start) / min(numLatencySamples, len(xTest)) * 1000
+  accuracy = float(np.mean(estimator.predict(xTest) == yTest))
+  return {'fitSec': fitTime, 'latencyMs': latencyMs, 'accuracy': accuracy}
+def checkEnsembleMember(numSamples=2000):
+  x, y = syntheticFeatureSet(numSamples)
+  x = StandardScaler().fit_transform(x)
+  member = ApproxKernelClassifier(nComponents=200, epochs=2)
+  if not is_classifier(member):
+    raise TypeError("ApproxKernelClassifier Is Not Recognised As A Classifier")
+  ensemble = VotingClassifier([('approxSvm', clone(member)), ('lr', LogisticRegression(max_iter=500))], voting='soft').fit(x, y)
+  probas = ensemble.predict_proba(x)
+  if probas.shape != (numSamples, len(np.unique(y))) or not np.allclose(probas.sum(axis=1), 1.0):
+    raise ValueError(f"Unexpected Ensemble Probabilities With Shape {probas.shape}")
+  print(f"VotingClassifier Fit With Cloned ApproxKernelClassifier: Accuracy {np.mean(ensemble.predict(x) == y):.4f}")
+def benchmarkKernels(sizes=(10000, 100000, 1000000), maxExactSamples=20000, numTest=5000):
+  results = []
+  print(f"{'Samples':>9} {'Model':>10} {'Fit s':>9} {'Predict ms':>11} {'Accuracy':>9}")
+  for numSamples in sizes:
+    x, y = syntheticFeatureSet(numSamples + numTest)
+    xTrain, xTest, yTrain, yTest = train_test_split(x, y, test_size=numTest, random_state=42, stratify=y)
+    scaler = StandardScaler().fit(xTrain)
+    xTrain, xTest = scaler.transform(xTrain), scaler.transform(xTest)
+    models = {'nystroem': ApproxKernelClassifier(method='nystroem'), 'rff': ApproxKernelClassifier(method='rff')}
+    if numSamples <= maxExactSamples:
+      models['exactSvc'] = SVC(kernel='rbf', probability=True, random_state=42, C=10, gamma='scale')
+    for name, estimator in models.items():
+      stats = timeFitPredict(estimator, xTrain, yTrain, xTest, yTest)
+      results.append({'samples': numSamples, 'model': name, **stats})
+      print(f"{numSamples:>9} {name:>10} {stats['fitSec']:>9.2f} {stats['latencyMs']:>11.3f} {stats['accuracy']:>9.4f}")
+    if numSamples > maxExactSamples:
+      print(f"{numSamples:>9} {'exactSvc':>10} {'skipped (above --max-exact)':>31}")
+  return results
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+  parser.add_argument("--max-exact", type=int, default=20000)
+  parser.add_argument("--check", action="store_true")
+  args = parser.parse_args()
+  if args.check:
+    checkEnsembleMember()
+  else:
+    benchmarkKernels(args.sizes, args.max_exact)
\ No newline at end of file
@@ -0,0 +1,38 @@
+import numpy as np
+from features import extractCombinedFeaturesBatch
+def augmentBatch(landmarks, rng, maxAngle=15, scaleRange=(0.85, 1.15), maxShift=0.1, mirrorProb=0.15, noiseStd=0.02):
+  points = np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+  numSamples = len(points)
+  angles = np.deg2rad(rng.uniform(-maxAngle, maxAngle, numSamples))
+  cosA, sinA = np.cos(angles), np.sin(angles)
+  rotations = np.stack([np.stack([cosA, -sinA], axis=-1), np.stack([sinA, cosA], axis=-1)], axis=-2)
+  xy = np.einsum('nij,npj->npi', rotations, points[..., :2])
+  xy *= rng.uniform(scaleRange[0], scaleRange[1], (numSamples, 1, 1))
+  xy += rng.uniform(-maxShift, maxShift, (numSamples, 1, 2))
+  xy[..., 0] *= np.where(rng.random(numSamples) < mirrorProb, -1.0, 1.0)[:, None]
+  augmented = np.concatenate([xy, points[..., 2:]], axis=-1) + rng.normal(0, noiseStd, points.shape)
+  return augmented.reshape(numSamples, 63).astype(np.float32)
+def augmentDataset(landmarks, labels, numAugmentations, rng):
+  landmarks = np.asarray(landmarks, dtype=np.float32)
+  copies = [landmarks] + [augmentBatch(landmarks, rng) for _ in range(numAugmentations)]
+  return np.concatenate(copies), np.tile(labels, numAugmentations + 1)
+def epochSize(numSamples, numAugmentations):
+  return numSamples * (numAugmentations + 1)
+def streamAugmentedBatches(landmarks, labels, batchSize, numAugmentations=1, seed=42, transform=None, epochs=None):
+  rng = np.random.default_rng(seed)
+  numSamples = len(landmarks)
+  epoch = 0
+  while epochs is None or epoch < epochs:
+    order = rng.permutation(epochSize(numSamples, numAugmentations))
+    for start in range(0, len(order), batchSize):
+      batchIdx = order[start:start+batchSize]
+      sampleIdx = batchIdx % numSamples
+      batch = np.array(landmarks[sampleIdx], dtype=np.float32)
+      augmentMask = batchIdx >= numSamples
+      if augmentMask.any():
+        batch[augmentMask] = augmentBatch(batch[augmentMask], rng)
+      features = extractCombinedFeaturesBatch(batch)
+      if transform is not None:
+        features = transform(features)
+      yield features, labels[sampleIdx]
+    epoch += 1
\ No newline at end of file
@@ -0,0 +1,159 @@
+import argparse
+import csv
+import json
+import os
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from sklearn.metrics import confusion_matrix
+from inference import SignPredictor
+from modelBundle import artifactPaths, loadLabelMap
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+VIDEO_SUFFIXES = {".mp4", ".avi", ".mov", ".mkv", ".webm"}
+PREDICTION_COLUMNS = ['path', 'frame', 'hand', 'trueLabel', 'predictedLabel', 'confidence', 'handDetected', 'detectMs', 'classifyMs', 'worker']
+def collectMedia(inputPaths):
+  images, videos = [], []
+  for inputPath in map(Path, inputPaths):
+    files = sorted(p for p in inputPath.rglob("*") if p.is_file()) if inputPath.is_dir() else [inputPath]
+    for path in files:
+      suffix = path.suffix.lower()
+      if suffix in IMAGE_SUFFIXES:
+        images.append(path)
+      elif suffix in VIDEO_SUFFIXES:
+        videos.append(path)
+  return images, videos
+def readFrames(path, frameStride=1):
+  if path.suffix.lower() in IMAGE_SUFFIXES:
+    image = cv2.imread(str(path))
+    if image is not None:
+      yield 0, image
+    return
+  cap = cv2.VideoCapture(str(path))
+  frameIdx = 0
+  while True:
+    ret, frame = cap.read()
+    if not ret:
+      break
+    if frameIdx % frameStride == 0:
+      yield frameIdx, frame
+    frameIdx += 1
+  cap.release()
+workerPredictor = None
+def initEvalWorker(modelDir, numHands=1):
+  global workerPredictor
+  workerPredictor = SignPredictor(*artifactPaths(modelDir), numHands=numHands)
+def evaluateChunk(paths, frameStride=1):
+  records = []
+  detected = []
+  for path in paths:
+    trueLabel = path.parent.name.upper()
+    for frameIdx, frame in readFrames(path, frameStride):
+      start = time.perf_counter()
+      landmarks, _ = workerPredictor.detectHands(frame)
+      detectMs = (time.perf_counter() - start) * 1000
+      for handIdx in range(max(len(landmarks), 1)):
+        if handIdx < len(landmarks):
+          detected.append((len(records), landmarks[handIdx]))
+        records.append({
+          'path': str(path), 'frame': frameIdx, 'hand': handIdx if len(landmarks) else -1, 'trueLabel': trueLabel, 'predictedLabel': "", 'confidence': 0.0,
+          'handDetected': handIdx < len(landmarks), 'detectMs': detectMs if handIdx == 0 else 0.0, 'classifyMs': 0.0, 'worker': os.getpid()
+        })
+  if detected:
+    start = time.perf_counter()
+    probas = workerPredictor.classifyBatch(np.stack([landmarks for _, landmarks in detected]))
+    classifyMs = (time.perf_counter() - start) * 1000 / len(detected)
+    for (recordIdx, _), row in zip(detected, probas):
+      predictedIdx = int(np.argmax(row))
+      records[recordIdx].update({
+        'predictedLabel': workerPredictor.labelList.get(predictedIdx, "Unknown"),
+        'confidence': float(row[predictedIdx]),
+        'classifyMs': classifyMs
+      })
+  return records
+def writePredictions(records, outputPath):
+  outputPath = Path(outputPath)
+  if outputPath.suffix == ".parquet":
+    try:
+      import pyarrow as pa
+      import pyarrow.parquet as pq
+    except ImportError:
+      raise ImportError("Writing Parquet Requires pyarrow, Install It Or Use A .csv Output") from None
+    pq.write_table(pa.Table.from_pylist(records), outputPath)
+    return
+  with open(outputPath, "w", newline="") as f:
+    writer = csv.DictWriter(f, fieldnames=PREDICTION_COLUMNS)
+    writer.writeheader()
+    writer.writerows(records)
+def summarize(records, labelNames, wallSec, numWorkers):
+  frames = [r for r in records if r['hand'] <= 0]
+  detected = [r for r in records if r['handDetected']]
+  scored = [r for r in detected if r['trueLabel'] in labelNames]
+  yTrue = [r['trueLabel'] for r in scored]
+  yPred = [r['predictedLabel'] for r in scored]
+  busySec = sum(r['detectMs'] + r['classifyMs'] for r in records) / 1000
+  return {
+    'frames': len(frames),
+    'handsDetected': len(detected),
+    'detectionRate': sum(r['handDetected'] for r in frames) / len(frames) if frames else 0.0,
+    'handsPerFrame': len(detected) / len(frames) if frames else 0.0,
+    'scoredFrames': len(scored),
+    'accuracy': float(np.mean(np.array(yTrue) == np.array(yPred))) if scored else 0.0,
+    'wallSec': wallSec,
+    'workers': numWorkers,
+    'framesPerSec': len(frames) / wallSec if wallSec else 0.0,
+    'framesPerSecPerCore': len(frames) / (wallSec * numWorkers) if wallSec else 0.0,
+    'framesPerBusySec': len(frames) / busySec if busySec else 0.0,
+    'handsPerSec': len(detected) / wallSec if wallSec else 0.0,
+    'meanDetectMs': float(np.mean([r['detectMs'] for r in frames])) if frames else 0.0,
+    'meanClassifyMs': float(np.mean([r['classifyMs'] for r in detected])) if detected else 0.0
+  }, confusion_matrix(yTrue, yPred, labels=labelNames) if scored else np.zeros((len(labelNames), len(labelNames)), dtype=np.int64)
+def writeConfusion(matrix, labelNames, outputPath):
+  with open(outputPath, "w", newline="") as f:
+    writer = csv.writer(f)
+    writer.writerow(['true\\predicted'] + labelNames)
+    for name, row in zip(labelNames, matrix):
+      writer.writerow([name] + [int(count) for count in row])
+def batchEvaluate(inputPaths, outputPath, modelDir, numWorkers=None, chunkSize=64, frameStride=1, numHands=1):
+  outputPath = Path(outputPath)
+  outputPath.parent.mkdir(parents=True, exist_ok=True)
+  images, videos = collectMedia(inputPaths)
+  chunks = [images[i:i+chunkSize] for i in range(0, len(images), chunkSize)] + [[video] for video in videos]
+  labelMap = loadLabelMap(artifactPaths(modelDir)[2])
+  labelNames = [name for name, _ in sorted(labelMap.items(), key=lambda item: item[1])]
+  numWorkers = max(1, min(numWorkers or os.cpu_count() or 1, len(chunks)))
+  print(f"Evaluating {len(images)} Images And {len(videos)} Videos With {numWorkers} Workers...")
+  records = []
+  start = time.perf_counter()
+  if numWorkers <= 1:
+    initEvalWorker(modelDir, numHands)
+    for chunk in chunks:
+      records.extend(evaluateChunk(chunk, frameStride))
+  else:
+    with ProcessPoolExecutor(max_workers=numWorkers, initializer=initEvalWorker, initargs=(str(modelDir), numHands)) as executor:
+      futures = [executor.submit(evaluateChunk, chunk, frameStride) for chunk in chunks]
+      for future in as_completed(futures):
+        records.extend(future.result())
+  wallSec = time.perf_counter() - start
+  records.sort(key=lambda r: (r['path'], r['frame'], r['hand']))
+  writePredictions(records, outputPath)
+  summary, matrix = summarize(records, labelNames, wallSec, numWorkers)
+  writeConfusion(matrix, labelNames, outputPath.with_name(outputPath.stem + "_confusion.csv"))
+  with open(outputPath.with_name(outputPath.stem + "_summary.json"), "w") as f:
+    json.dump(summary, f, indent=2)
+  print(f"Frames: {summary['frames']} | Hands: {summary['handsDetected']} ({summary['detectionRate']:.1%} Of Frames, {summary['handsPerFrame']:.2f} Per Frame) | Accuracy: {summary['accuracy']:.4f}")
+  print(f"Throughput: {summary['framesPerSec']:.1f} Frames/s, {summary['framesPerSecPerCore']:.1f} Frames/s Per Core, {summary['handsPerSec']:.1f} Hands/s")
+  print(f"Predictions Saved To {outputPath}")
+  return summary, matrix
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("inputs", type=Path, nargs="+")
+  parser.add_argument("--output", type=Path, default=Path("evaluation") / "predictions.csv")
+  parser.add_argument("--model-dir", type=Path, default=Path(__file__).parent / "savedModels")
+  parser.add_argument("--workers", type=int, default=None)
+  parser.add_argument("--chunk-size", type=int, default=64)
+  parser.add_argument("--frame-stride", type=int, default=1)
+  parser.add_argument("--num-hands", type=int, default=1)
+  args = parser.parse_args()
+  batchEvaluate(args.inputs, args.output, args.model_dir, args.workers, args.chunk_size, args.frame_stride, args.num_hands)
\ No newline at end of file
@@ -0,0 +1,222 @@
+import warnings
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import cv2
+import joblib
+import numpy as np
+from pathlib import Path
+from tensorflow import keras
+from augmentation import augmentBatch
+from features import extractCombinedFeatures, extractCombinedFeaturesBatch, syntheticLandmarks
+from inference import PredictionSmoother, SignClassifier
+from instrumentation import writeAtomic
+from modelBundle import MANIFEST_FILE, artifactPaths, exportBundle
+from trainEnsemble import assembleEnsemble, createMembers
+from tfliteRuntime import runtimeName
+from trainTflite import convertModel, createMlpModel
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+warnings.filterwarnings('ignore')
+HAND_MODEL_PATH = Path(__file__).parent / "data" / "hand_landmarker.task"
+BATCH_SIZES = (1, 8, 32, 64)
+def timeOperation(operation, numIterations, numRepeats=7, numWarmup=3, samplesPerOp=1):
+  for _ in range(numWarmup):
+    operation()
+  timings = []
+  for _ in range(numRepeats):
+    start = time.perf_counter()
+    for _ in range(numIterations):
+      operation()
+    timings.append((time.perf_counter() - start) / numIterations / samplesPerOp * 1e6)
+  return summarizeTimings(timings, samplesPerOp)
+def summarizeTimings(timings, samplesPerOp=1):
+  q1, median, q3 = np.percentile(timings, [25, 50, 75])
+  return {'medianUs': float(median), 'minUs': float(np.min(timings)), 'iqrUs': float(q3 - q1), 'samplesPerOp': samplesPerOp}
+def syntheticDataset(numSamples, numClasses, seed=42):
+  rng = np.random.default_rng(seed)
+  prototypes = syntheticLandmarks(numClasses, seed)
+  labels = np.arange(numSamples) % numClasses
+  landmarks = prototypes[labels] + rng.normal(0, 0.03, (numSamples, prototypes.shape[1])).astype(np.float32)
+  return landmarks, labels
+def syntheticHandImage(landmarks, width=640, height=480, seed=42):
+  rng = np.random.default_rng(seed)
+  image = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+  points = [(int(x * width), int(y * height)) for x, y in landmarks.reshape(21, 3)[:, :2]]
+  for start, end in zip(points[:-1], points[1:]):
+    cv2.line(image, start, end, (190, 160, 140), 12)
+  return cv2.imencode(".jpg", image)[1].tobytes()
+def buildFixtureModels(fixtureDir, numClasses=26, numSamples=2600, seed=42):
+  fixtureDir = Path(fixtureDir)
+  fixtureDir.mkdir(parents=True, exist_ok=True)
+  if all((fixtureDir / name).exists() for name in ("saslModel.tflite", "scalerParams.npy", "labelMap.npy", "ensemble.joblib")):
+    return fixtureDir
+  print(f"Building Fixture Models In {fixtureDir}...")
+  landmarks, labels = syntheticDataset(numSamples, numClasses, seed)
+  features = extractCombinedFeaturesBatch(landmarks)
+  mean, scale = features.mean(axis=0), features.std(axis=0) + 1e-6
+  scaled = ((features - mean) / scale).astype(np.float32)
+  keras.utils.set_random_seed(seed)
+  model = createMlpModel(features.shape[1], numClasses)
+  model.fit(scaled, labels, epochs=3, batch_size=64, verbose=0)
+  with open(fixtureDir / "saslModel.tflite", "wb") as f:
+    f.write(convertModel(model, 'dynamic'))
+  np.save(fixtureDir / "scalerParams.npy", {'mean': mean, 'scale': scale})
+  np.save(fixtureDir / "labelMap.npy", {chr(ord('A') + i): i for i in range(numClasses)})
+  members = {name: estimator.fit(scaled, labels) for name, estimator in createMembers().items()}
+  joblib.dump(assembleEnsemble(members, labels), fixtureDir / "ensemble.joblib")
+  return fixtureDir
+def benchmarkImages(landmarks, fixtureDir, results):
+  encoded = np.frombuffer(syntheticHandImage(landmarks[0]), dtype=np.uint8)
+  results['image.decode'] = timeOperation(lambda: cv2.imdecode(encoded, cv2.IMREAD_COLOR), 50)
+  if not HAND_MODEL_PATH.exists():
+    print(f"Skipping image.extractFromImage ({HAND_MODEL_PATH.name} Not Found)")
+    return
+  imagePath = Path(fixtureDir) / "hand.jpg"
+  imagePath.write_bytes(encoded.tobytes())
+  from data.extractLandmarks import createDetector, extractFromImage
+  detector = createDetector(str(HAND_MODEL_PATH))
+  results['image.extractFromImage'] = timeOperation(lambda: extractFromImage(imagePath, detector), 10)
+  detector.close()
+def benchmarkFeatureExtraction(landmarks, results):
+  rng = np.random.default_rng(42)
+  results['features.perSample'] = timeOperation(lambda: extractCombinedFeatures(landmarks[0]), 500)
+  results['features.batch4096'] = timeOperation(lambda: extractCombinedFeaturesBatch(landmarks), 5, samplesPerOp=len(landmarks))
+  results['augmentation.batch4096'] = timeOperation(lambda: augmentBatch(landmarks, rng), 5, samplesPerOp=len(landmarks))
+def benchmarkClassifier(landmarks, fixtureDir, results):
+  classifier = SignClassifier(fixtureDir / "saslModel.tflite", fixtureDir / "scalerParams.npy", fixtureDir / "labelMap.npy")
+  scaled = classifier.scaleFeatures(extractCombinedFeaturesBatch(landmarks[:max(BATCH_SIZES)]))
+  inputIndex = classifier.inputDetails[0]['index']
+  for batchSize in BATCH_SIZES:
+    interpreter = classifier.getInterpreter(batchSize)
+    interpreter.set_tensor(inputIndex, scaled[:batchSize])
+    results[f'tflite.invoke.b{batchSize}'] = timeOperation(interpreter.invoke, 200, samplesPerOp=batchSize)
+  smoother = PredictionSmoother()
+  def predict():
+    probas = classifier.classifyBatch(landmarks[:1])[0]
+    predictedIdx = int(np.argmax(probas))
+    smoother.update(predictedIdx, float(probas[predictedIdx]))
+  results['classifier.predict'] = timeOperation(predict, 200)
+def benchmarkEnsemble(landmarks, fixtureDir, results):
+  ensemble = joblib.load(fixtureDir / "ensemble.joblib")
+  features = extractCombinedFeaturesBatch(landmarks[:256])
+  results['ensemble.predictProba.b1'] = timeOperation(lambda: ensemble.predict_proba(features[:1]), 10)
+  results['ensemble.predictProba.b256'] = timeOperation(lambda: ensemble.predict_proba(features), 3, samplesPerOp=len(features))
+COLD_START_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from features import syntheticLandmarks
+from inference import SignClassifier
+imported = time.perf_counter()
+classifier = SignClassifier(*sys.argv[1:4])
+loaded = time.perf_counter()
+classifier.classifyBatch(syntheticLandmarks(1))
+classified = time.perf_counter()
+SignClassifier(*sys.argv[1:4]).classifyBatch(syntheticLandmarks(1))
+print(json.dumps({'import': imported - start, 'load': loaded - imported, 'firstClassify': classified - loaded, 'secondInstance': time.perf_counter() - classified}))
+"""
+def benchmarkColdStart(landmarks, fixtureDir, results, numRepeats=5):
+  bundleDir = Path(fixtureDir) / "bundle"
+  if not (bundleDir / MANIFEST_FILE).exists():
+    exportBundle(fixtureDir, bundleDir)
+  samples = {}
+  for _ in range(numRepeats):
+    start = time.perf_counter()
+    completed = subprocess.run(
+      [sys.executable, "-c", COLD_START_SCRIPT, *map(str, artifactPaths(bundleDir))],
+      capture_output=True, text=True, cwd=Path(__file__).parent, check=True
+    )
+    timings = json.loads(completed.stdout.strip().splitlines()[-1])
+    timings['process'] = time.perf_counter() - start
+    for name, seconds in timings.items():
+      samples.setdefault(name, []).append(seconds * 1e6)
+  for name, values in samples.items():
+    results[f'startup.{name}'] = summarizeTimings(values)
+SUITES = {
+  'images': benchmarkImages,
+  'features': lambda landmarks, fixtureDir, results: benchmarkFeatureExtraction(landmarks, results),
+  'classifier': benchmarkClassifier,
+  'ensemble': benchmarkEnsemble,
+  'startup': benchmarkColdStart
+}
+def environmentInfo():
+  try:
+    commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=Path(__file__).parent).stdout.strip()
+  except OSError:
+    commit = ""
+  return {
+    'commit': commit,
+    'python': platform.python_version(),
+    'numpy': np.__version__,
+    'machine': platform.machine(),
+    'node': platform.node(),
+    'cpuCount': os.cpu_count(),
+    'tfliteRuntime': runtimeName()
+  }
+def runSuite(historyPath, fixtureDir, suites=None, seed=42):
+  fixtureDir = buildFixtureModels(fixtureDir, seed=seed)
+  landmarks = syntheticLandmarks(4096, seed)
+  results = {}
+  for name in suites or SUITES:
+    print(f"Running {name}...")
+    SUITES[name](landmarks, fixtureDir, results)
+  print(f"{'Benchmark':<28} {'Median us':>11} {'Min us':>10} {'IQR us':>9}")
+  for name, stats in results.items():
+    print(f"{name:<28} {stats['medianUs']:>11.3f} {stats['minUs']:>10.3f} {stats['iqrUs']:>9.3f}")
+  run = {'timestamp': time.time(), 'seed': seed, 'environment': environmentInfo(), 'results': results}
+  history = loadHistory(historyPath)
+  history.append(run)
+  writeAtomic(historyPath, lambda f: json.dump(history, f, indent=2))
+  print(f"Appended Run {len(history) - 1} To {historyPath}")
+  return run
+def loadHistory(historyPath):
+  if not Path(historyPath).exists():
+    return []
+  with open(historyPath) as f:
+    return json.load(f)
+def compareRuns(baseline, current, threshold=0.15):
+  regressions = []
+  print(f"{'Benchmark':<28} {'Baseline us':>12} {'Current us':>11} {'Change':>8}")
+  for name, stats in current['results'].items():
+    if name not in baseline['results']:
+      print(f"{name:<28} {'-':>12} {stats['medianUs']:>11.3f} {'new':>8}")
+      continue
+    before = baseline['results'][name]['medianUs']
+    change = stats['medianUs'] / before - 1
+    flag = ""
+    if change > threshold:
+      flag = " REGRESSION"
+      regressions.append(name)
+    print(f"{name:<28} {before:>12.3f} {stats['medianUs']:>11.3f} {change:>+8.1%}{flag}")
+  hardware = ('node', 'machine', 'cpuCount')
+  if any(baseline['environment'].get(key) != current['environment'].get(key) for key in hardware):
+    print("Warning: Runs Were Recorded On Different Machines")
+  return regressions
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--history", type=Path, default=Path(__file__).parent / "benchmarkHistory.json")
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  runParser = subparsers.add_parser("run")
+  runParser.add_argument("--fixture-dir", type=Path, default=Path(__file__).parent / "benchmarkFixtures")
+  runParser.add_argument("--suites", nargs="+", choices=list(SUITES), default=None)
+  runParser.add_argument("--seed", type=int, default=42)
+  compareParser = subparsers.add_parser("compare")
+  compareParser.add_argument("--baseline", type=int, default=-2)
+  compareParser.add_argument("--current", type=int, default=-1)
+  compareParser.add_argument("--threshold", type=float, default=0.15)
+  args = parser.parse_args()
+  if args.command == "run":
+    runSuite(args.history, args.fixture_dir, args.suites, args.seed)
+  else:
+    history = loadHistory(args.history)
+    if len(history) < 2:
+      sys.exit(f"Need At Least Two Runs In {args.history} To Compare")
+    regressions = compareRuns(history[args.baseline], history[args.current], args.threshold)
+    if regressions:
+      print(f"{len(regressions)} Regressions Beyond {args.threshold:.0%}: {', '.join(regressions)}")
+      sys.exit(1)
+    print(f"No Regressions Beyond {args.threshold:.0%}")
\ No newline at end of file
@@ -0,0 +1,96 @@
+import json
+import time
+import joblib
+import numpy as np
+from pathlib import Path
+from sklearn.model_selection import train_test_split
+from dataset import loadDataset
+class CascadeClassifier:
+  def __init__(self, ensemble, cheapMembers=('lr', 'mlp'), threshold=0.3):
+    members = dict(ensemble.named_estimators_)
+    self.cheap = [(name, members[name]) for name in cheapMembers]
+    self.expensive = [(name, estimator) for name, estimator in members.items() if name not in cheapMembers]
+    self.classes_ = ensemble.classes_
+    self.threshold = threshold
+  def memberProba(self, members, x):
+    return sum(estimator.predict_proba(x) for _, estimator in members)
+  def uncertainMask(self, cheapProba, threshold=None):
+    threshold = self.threshold if threshold is None else threshold
+    topTwo = np.partition(cheapProba, -2, axis=1)[:, -2:]
+    return (topTwo[:, 1] - topTwo[:, 0]) < threshold
+  def predict_proba(self, x, threshold=None):
+    x = np.asarray(x)
+    proba = self.memberProba(self.cheap, x) / len(self.cheap)
+    uncertain = self.uncertainMask(proba, threshold)
+    if uncertain.any() and self.expensive:
+      expensive = self.memberProba(self.expensive, x[uncertain])
+      proba[uncertain] = (proba[uncertain] * len(self.cheap) + expensive) / (len(self.cheap) + len(self.expensive))
+    return proba
+  def predict(self, x, threshold=None):
+    return self.classes_[np.argmax(self.predict_proba(x, threshold), axis=1)]
+def perSampleLatency(predict, x, numSamples=200):
+  samples = np.asarray(x[:numSamples])
+  start = time.perf_counter()
+  for row in samples:
+    predict(row[None])
+  return (time.perf_counter() - start) / len(samples) * 1000
+def evaluateCascade(cascade, ensemble, xTest, yTest, thresholds=(0.0, 0.1, 0.2, 0.3, 0.5, 0.7, 1.01), numLatencySamples=200):
+  report = {
+    'ensemble': {
+      'accuracy': float(np.mean(ensemble.predict(xTest) == yTest)),
+      'escalated': 1.0,
+      'latencyMs': perSampleLatency(ensemble.predict, xTest, numLatencySamples)
+    },
+    'thresholds': {}
+  }
+  print(f"{'Threshold':>9} {'Accuracy':>9} {'Escalated':>9} {'Latency ms':>11}")
+  print(f"{'ensemble':>9} {report['ensemble']['accuracy']:>9.4f} {1.0:>9.1%} {report['ensemble']['latencyMs']:>11.3f}")
+  for threshold in thresholds:
+    yPred = cascade.predict(xTest, threshold)
+    cheapProba = cascade.memberProba(cascade.cheap, xTest) / len(cascade.cheap)
+    stats = {
+      'accuracy': float(np.mean(yPred == yTest)),
+      'escalated': float(np.mean(cascade.uncertainMask(cheapProba, threshold))),
+      'latencyMs': perSampleLatency(lambda row: cascade.predict(row, threshold), xTest, numLatencySamples)
+    }
+    report['thresholds'][str(threshold)] = stats
+    print(f"{threshold:>9.2f} {stats['accuracy']:>9.4f} {stats['escalated']:>9.1%} {stats['latencyMs']:>11.3f}")
+  return report
+def selectThreshold(report, accuracyBudget=0.005):
+  target = report['ensemble']['accuracy'] - accuracyBudget
+  eligible = [(stats['latencyMs'], float(threshold)) for threshold, stats in report['thresholds'].items() if stats['accuracy'] >= target]
+  if not eligible:
+    return max(float(threshold) for threshold in report['thresholds'])
+  return min(eligible)[1]
+def buildCascade(ensemble, xVal, yVal, xTest, yTest, outputPath, accuracyBudget=0.005):
+  outputPath = Path(outputPath)
+  cascade = CascadeClassifier(ensemble)
+  print("Sweeping Thresholds On Validation Set")
+  validation = evaluateCascade(cascade, ensemble, xVal, yVal)
+  cascade.threshold = selectThreshold(validation, accuracyBudget)
+  print(f"Selected Cascade Threshold {cascade.threshold:.2f}, Held-Out Test Set:")
+  test = evaluateCascade(cascade, ensemble, xTest, yTest, thresholds=(cascade.threshold,))
+  report = {
+    'selectedThreshold': cascade.threshold,
+    'validation': validation,
+    'test': {'ensemble': test['ensemble'], 'cascade': test['thresholds'][str(cascade.threshold)]}
+  }
+  joblib.dump(cascade, outputPath / "cascade.joblib")
+  with open(outputPath / "cascadeReport.json", "w") as f:
+    json.dump(report, f, indent=2)
+  return cascade, report
+def loadCascade(modelPath):
+  return joblib.load(modelPath)
+if __name__ == "__main__":
+  dataPath = Path(__file__).parent / "data" / "processed"
+  outputPath = Path(__file__).parent / "savedModels"
+  features, labels, _ = loadDataset(dataPath)
+  xTrain, xTest, yTrain, yTest = train_test_split(
+    features, labels, test_size=0.2, random_state=42, stratify=labels
+  )
+  _, xVal, _, yVal = train_test_split(
+    xTrain, yTrain, test_size=0.1, random_state=42, stratify=yTrain
+  )
+  ensemble = joblib.load(outputPath / "ensemble.joblib")
+  scaler = joblib.load(outputPath / "scaler.joblib")
+  buildCascade(ensemble, scaler.transform(xVal), yVal, scaler.transform(xTest), yTest, outputPath)
\ No newline at end of file
@@ -0,0 +1,69 @@
+import json
+import numpy as np
+from pathlib import Path
+from features import RAW_DIM, ANGLE_DIM, COMBINED_DIM, featureSchemaHash
+SCHEMA_VERSION = 1
+HEADER_FILE = "dataset.json"
+FEATURES_FILE = "features.npy"
+LABELS_FILE = "labels.npy"
+LANDMARKS_FILE = "landmarks.npy"
+LANDMARK_LABELS_FILE = "landmarkLabels.npy"
+FEATURE_COLUMNS = {
+  'raw': (0, RAW_DIM),
+  'angles': (RAW_DIM, RAW_DIM + ANGLE_DIM),
+  'distances': (RAW_DIM + ANGLE_DIM, COMBINED_DIM)
+}
+def saveDataset(outputPath, features, labels, labelMap, landmarks=None, landmarkLabels=None):
+  outputPath = Path(outputPath)
+  outputPath.mkdir(parents=True, exist_ok=True)
+  features = np.asarray(features, dtype=np.float32)
+  if features.shape[1] != COMBINED_DIM:
+    raise ValueError(f"Expected {COMBINED_DIM} Feature Columns, Got {features.shape[1]}")
+  np.save(outputPath / FEATURES_FILE, features)
+  np.save(outputPath / LABELS_FILE, np.asarray(labels, dtype=np.int32))
+  files = {'features': FEATURES_FILE, 'labels': LABELS_FILE}
+  if landmarks is not None:
+    np.save(outputPath / LANDMARKS_FILE, np.asarray(landmarks, dtype=np.float32))
+    np.save(outputPath / LANDMARK_LABELS_FILE, np.asarray(landmarkLabels, dtype=np.int32))
+    files['landmarks'] = LANDMARKS_FILE
+    files['landmarkLabels'] = LANDMARK_LABELS_FILE
+  header = {
+    'schemaVersion': SCHEMA_VERSION,
+    'numSamples': len(features),
+    'numFeatures': COMBINED_DIM,
+    'featureSchemaHash': featureSchemaHash(),
+    'columns': {name: list(span) for name, span in FEATURE_COLUMNS.items()},
+    'labelMap': {name: int(idx) for name, idx in labelMap.items()},
+    'files': files
+  }
+  with open(outputPath / HEADER_FILE, "w") as f:
+    json.dump(header, f, indent=2)
+  return header
+def loadHeader(dataPath):
+  headerPath = Path(dataPath) / HEADER_FILE
+  if not headerPath.exists():
+    raise FileNotFoundError(f"No {HEADER_FILE} In {dataPath}, Re-Run data/extractLandmarks.py")
+  with open(headerPath) as f:
+    header = json.load(f)
+  if header['schemaVersion'] != SCHEMA_VERSION:
+    raise ValueError(f"Dataset Schema Version {header['schemaVersion']} Does Not Match {SCHEMA_VERSION}")
+  if header.get('featureSchemaHash') != featureSchemaHash():
+    raise ValueError(f"Feature Schema Mismatch: Dataset {header.get('featureSchemaHash')}, Code {featureSchemaHash()}, Re-Run data/extractLandmarks.py")
+  return header
+def loadDataset(dataPath, mmapMode='r'):
+  dataPath = Path(dataPath)
+  header = loadHeader(dataPath)
+  features = np.load(dataPath / header['files']['features'], mmap_mode=mmapMode)
+  labels = np.load(dataPath / header['files']['labels'], mmap_mode=mmapMode)
+  return features, labels, header
+def loadLandmarkSet(dataPath, mmapMode='r'):
+  dataPath = Path(dataPath)
+  header = loadHeader(dataPath)
+  if 'landmarks' not in header['files']:
+    raise FileNotFoundError(f"Dataset In {dataPath} Has No Landmarks")
+  landmarks = np.load(dataPath / header['files']['landmarks'], mmap_mode=mmapMode)
+  labels = np.load(dataPath / header['files']['landmarkLabels'], mmap_mode=mmapMode)
+  return landmarks, labels, header
+def featureColumns(features, name):
+  start, end = FEATURE_COLUMNS[name]
+  return features[:, start:end]
\ No newline at end of file
@@ -0,0 +1,155 @@
+import warnings
+import argparse
+import hashlib
+import joblib
+import json
+import os
+import numpy as np
+from pathlib import Path
+from sklearn.model_selection import train_test_split
+from tensorflow.keras import layers
+from tensorflow import keras
+from dataset import FEATURES_FILE, loadDataset
+from landmarkCache import hashFile
+from trainTflite import QUANTIZATION_VARIANTS, convertModel, evaluateTflite, foldScalerIntoModel, saveScalerParams
+from modelBundle import LABEL_MAP_FILE, saveLabelMapJson
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+warnings.filterwarnings('ignore')
+def softTargetsKey(dataPath, modelPath):
+  digest = hashlib.blake2b(digest_size=16)
+  for path in (Path(dataPath) / FEATURES_FILE, Path(modelPath) / "ensemble.joblib", Path(modelPath) / "scaler.joblib"):
+    digest.update(hashFile(path).encode())
+  return digest.hexdigest()
+def computeSoftTargets(ensemble, scaler, features, numClasses, chunkSize=8192):
+  targets = np.zeros((len(features), numClasses), dtype=np.float32)
+  columns = np.asarray(ensemble.classes_, dtype=np.int64)
+  for start in range(0, len(features), chunkSize):
+    chunk = scaler.transform(np.asarray(features[start:start+chunkSize]))
+    targets[start:start+len(chunk), columns] = ensemble.predict_proba(chunk)
+  return targets
+def loadSoftTargets(dataPath, modelPath, features, numClasses):
+  cachePath = Path(modelPath) / f"softTargets-{softTargetsKey(dataPath, modelPath)}.npy"
+  if cachePath.exists():
+    print(f"Loaded Cached Soft Targets From {cachePath}")
+    return np.load(cachePath, mmap_mode='r')
+  print("Computing Ensemble Soft Targets...")
+  ensemble = joblib.load(Path(modelPath) / "ensemble.joblib")
+  scaler = joblib.load(Path(modelPath) / "scaler.joblib")
+  targets = computeSoftTargets(ensemble, scaler, features, numClasses)
+  tmpPath = cachePath.with_name(cachePath.stem + ".tmp.npy")
+  np.save(tmpPath, targets)
+  os.replace(tmpPath, cachePath)
+  print(f"Cached Soft Targets To {cachePath}")
+  return targets
+def createStudentModel(inputShape, numClasses, width=64, depth=2):
+  model = keras.Sequential([layers.Input(shape=(inputShape,))])
+  for i in range(depth):
+    model.add(layers.Dense(max(width >> i, numClasses), activation='relu'))
+    model.add(layers.BatchNormalization())
+  model.add(layers.Dense(numClasses, activation='softmax'))
+  model.compile(
+    optimizer=keras.optimizers.Adam(learning_rate=0.001),
+    loss='categorical_crossentropy',
+    metrics=['accuracy']
+  )
+  return model
+def distillTargets(softTargets, labels, numClasses, alpha=0.7):
+  return alpha * np.asarray(softTargets, dtype=np.float32) + (1 - alpha) * np.eye(numClasses, dtype=np.float32)[labels]
+def trainStudent(xTrain, yTrainTargets, xTest, yTest, numClasses, width, depth, epochs=100, batchSize=64):
+  keras.utils.set_random_seed(42)
+  model = createStudentModel(xTrain.shape[1], numClasses, width, depth)
+  earlyStopping = keras.callbacks.EarlyStopping(monitor='val_accuracy', mode='max', patience=10, restore_best_weights=True)
+  model.fit(
+    xTrain, yTrainTargets,
+    validation_data=(xTest, np.eye(numClasses, dtype=np.float32)[yTest]),
+    epochs=epochs,
+    batch_size=batchSize,
+    callbacks=[earlyStopping],
+    verbose=0
+  )
+  return model
+def selectStudent(report, accuracyBudget=0.005, promote=False):
+  target = report['teacher']['accuracy'] - accuracyBudget
+  students = report['students']
+  eligible = [name for name, stats in students.items() if stats['accuracy'] >= target]
+  if not eligible:
+    return max(students, key=lambda name: students[name]['accuracy']) if promote else None
+  return min(eligible, key=lambda name: (students[name]['sizeKb'], students[name]['latencyUs']))
+def distillEnsemble(dataPath, modelPath, widths=(32, 64, 128), depths=(1, 2, 3), epochs=100, batchSize=64, alpha=0.7, foldScaler=False, quantization='dynamic', accuracyBudget=0.005, promote=False):
+  modelPath = Path(modelPath)
+  features, labels, header = loadDataset(dataPath)
+  labelMap = header['labelMap']
+  numClasses = len(labelMap)
+  labels = np.asarray(labels)
+  print(f"Loaded {len(features)} Samples, {features.shape[1]} Features, {numClasses} Classes")
+  softTargets = loadSoftTargets(dataPath, modelPath, features, numClasses)
+  trainIdx, testIdx = train_test_split(
+    np.arange(len(features)), test_size=0.2, random_state=42, stratify=labels
+  )
+  trainIdx, testIdx = np.sort(trainIdx), np.sort(testIdx)
+  scaler = joblib.load(modelPath / "scaler.joblib")
+  xTrain, xTest = np.asarray(features[trainIdx]), np.asarray(features[testIdx])
+  xTrainScaled = scaler.transform(xTrain).astype(np.float32)
+  xTestScaled = scaler.transform(xTest).astype(np.float32)
+  yTest = labels[testIdx]
+  yTrainTargets = distillTargets(softTargets[trainIdx], labels[trainIdx], numClasses, alpha)
+  report = {
+    'teacher': {'accuracy': float(np.mean(np.argmax(softTargets[testIdx], axis=1) == yTest))},
+    'alpha': alpha,
+    'quantization': quantization,
+    'students': {}
+  }
+  studentDir = modelPath / "students"
+  studentDir.mkdir(parents=True, exist_ok=True)
+  tfliteModels = {}
+  print(f"Teacher Ensemble Accuracy: {report['teacher']['accuracy']:.4f}")
+  print(f"{'Student':>8} {'Params':>8} {'Accuracy':>9} {'Latency us':>11} {'Size KB':>8}")
+  for depth in depths:
+    for width in widths:
+      name = f"{width}x{depth}"
+      model = trainStudent(xTrainScaled, yTrainTargets, xTestScaled, yTest, numClasses, width, depth, epochs, batchSize)
+      exportModel = foldScalerIntoModel(model, scaler) if foldScaler else model
+      tfliteModels[name] = convertModel(exportModel, quantization, xTrain if foldScaler else xTrainScaled)
+      with open(studentDir / f"saslStudent_{name}.tflite", "wb") as f:
+        f.write(tfliteModels[name])
+      stats = evaluateTflite(tfliteModels[name], xTest if foldScaler else xTestScaled, yTest)
+      stats.update({'width': width, 'depth': depth, 'params': int(model.count_params())})
+      report['students'][name] = stats
+      print(f"{name:>8} {stats['params']:>8} {stats['accuracy']:>9.4f} {stats['latencyUs']:>11.1f} {stats['sizeKb']:>8.1f}")
+  selected = selectStudent(report, accuracyBudget, promote)
+  report['selected'] = selected
+  with open(modelPath / "distillReport.json", "w") as f:
+    json.dump(report, f, indent=2)
+  if selected is None:
+    print(f"No Student Within {accuracyBudget:.1%} Of Teacher Accuracy, Nothing Shipped (Students Kept In {studentDir}, Use --promote To Ship The Most Accurate)")
+    return report
+  if report['students'][selected]['accuracy'] >= report['teacher']['accuracy'] - accuracyBudget:
+    print(f"Selected Student {selected} (Smallest Within {accuracyBudget:.1%} Of Teacher Accuracy)")
+  else:
+    print(f"Promoting Most Accurate Student {selected} Outside The {accuracyBudget:.1%} Accuracy Budget")
+  with open(modelPath / "saslModel.tflite", "wb") as f:
+    f.write(tfliteModels[selected])
+  saveScalerParams(scaler, foldScaler, modelPath)
+  np.save(modelPath / "labelMap.npy", labelMap)
+  saveLabelMapJson(labelMap, modelPath / LABEL_MAP_FILE)
+  print(f"TFLite Model Saved To {modelPath / 'saslModel.tflite'}")
+  return report
+if __name__ == "__main__":
+  dataPath = Path(__file__).parent / "data" / "processed"
+  modelPath = Path(__file__).parent / "savedModels"
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--widths", type=int, nargs="+", default=[32, 64, 128])
+  parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3])
+  parser.add_argument("--epochs", type=int, default=100)
+  parser.add_argument("--alpha", type=float, default=0.7)
+  parser.add_argument("--fold-scaler", action="store_true")
+  parser.add_argument("--quantization", choices=QUANTIZATION_VARIANTS, default='dynamic')
+  parser.add_argument("--accuracy-budget", type=float, default=0.005)
+  parser.add_argument("--promote", action="store_true")
+  args = parser.parse_args()
+  distillEnsemble(
+    dataPath, modelPath, widths=args.widths, depths=args.depths, epochs=args.epochs, alpha=args.alpha,
+    foldScaler=args.fold_scaler, quantization=args.quantization, accuracyBudget=args.accuracy_budget,
+    promote=args.promote
+  )
\ No newline at end of file
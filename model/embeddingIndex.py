@@ -0,0 +1,168 @@
+import argparse
+import json
+import time
+import numpy as np
+from pathlib import Path
+from sklearn.neighbors import KDTree
+from features import extractRawFeaturesBatch, syntheticLandmarks
+from dataset import loadLandmarkSet
+INDEX_FILE = "embeddingIndex.npz"
+def embedLandmarks(landmarks):
+  embeddings = extractRawFeaturesBatch(landmarks)
+  return embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + np.float32(1e-6))
+class EmbeddingIndex:
+  def __init__(self, numComponents=16, leafSize=40, candidateFactor=10, chunkSize=2048):
+    self.numComponents = numComponents
+    self.leafSize = leafSize
+    self.candidateFactor = candidateFactor
+    self.chunkSize = chunkSize
+  def fit(self, embeddings, labels, numClasses=None):
+    self.embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    self.labels = np.asarray(labels, dtype=np.int32)
+    self.numClasses = numClasses or int(self.labels.max()) + 1
+    self.mean = self.embeddings.mean(axis=0)
+    _, _, vt = np.linalg.svd(self.embeddings - self.mean, full_matrices=False)
+    self.components = vt[:self.numComponents].T.astype(np.float32)
+    self.projected = self.project(self.embeddings)
+    self.tree = KDTree(self.projected, leaf_size=self.leafSize)
+    sample = np.random.default_rng(42).permutation(len(self.embeddings))[:2000]
+    distances, _ = self.query(self.embeddings[sample], 11)
+    self.supportRadius = float(np.percentile(distances[:, -1], 95))
+    return self
+  def project(self, embeddings):
+    return (np.asarray(embeddings, dtype=np.float32) - self.mean) @ self.components
+  def query(self, embeddings, k=10):
+    embeddings = np.asarray(embeddings, dtype=np.float32).reshape(-1, self.embeddings.shape[1])
+    k = min(k, len(self.embeddings))
+    numCandidates = min(k * self.candidateFactor, len(self.embeddings))
+    distances = np.empty((len(embeddings), k), dtype=np.float32)
+    indices = np.empty((len(embeddings), k), dtype=np.int64)
+    for start in range(0, len(embeddings), self.chunkSize):
+      chunk = embeddings[start:start+self.chunkSize]
+      _, candidates = self.tree.query(self.project(chunk), k=numCandidates)
+      chunkDistances = np.linalg.norm(self.embeddings[candidates] - chunk[:, None], axis=2)
+      order = np.argsort(chunkDistances, axis=1, kind='stable')[:, :k]
+      distances[start:start+len(chunk)] = np.take_along_axis(chunkDistances, order, axis=1)
+      indices[start:start+len(chunk)] = np.take_along_axis(candidates, order, axis=1)
+    return distances, indices
+  def vote(self, embeddings, k=10):
+    distances, indices = self.query(embeddings, k)
+    probas = np.zeros((len(indices), self.numClasses), dtype=np.float32)
+    np.add.at(probas, (np.arange(len(indices))[:, None], self.labels[indices]), 1)
+    return probas / indices.shape[1], distances[:, -1] <= self.supportRadius
+  def predictProba(self, embeddings, k=10):
+    return self.vote(embeddings, k)[0]
+  def dedupe(self, radius):
+    neighbours = self.tree.query_radius(self.projected, radius)
+    keep = np.ones(len(self.embeddings), dtype=bool)
+    for i, candidates in enumerate(neighbours):
+      if not keep[i]:
+        continue
+      candidates = candidates[candidates > i]
+      candidates = candidates[keep[candidates] & (self.labels[candidates] == self.labels[i])]
+      if len(candidates):
+        close = np.linalg.norm(self.embeddings[candidates] - self.embeddings[i], axis=1) <= radius
+        keep[candidates[close]] = False
+    return np.flatnonzero(keep)
+  def hardness(self, k=10):
+    _, indices = self.query(self.embeddings, k + 1)
+    return np.mean(self.labels[indices[:, 1:]] != self.labels[:, None], axis=1)
+  def selectSamples(self, perClass, hardFraction=0.3, k=10):
+    hardness = self.hardness(k)
+    selected = []
+    for label in range(self.numClasses):
+      members = np.flatnonzero(self.labels == label)
+      if len(members) <= perClass:
+        selected.append(members)
+        continue
+      numHard = int(perClass * hardFraction)
+      hardOrder = np.argsort(-hardness[members], kind='stable')[:numHard]
+      hardOrder = hardOrder[hardness[members[hardOrder]] > 0]
+      chosen = list(members[hardOrder])
+      points = self.embeddings[members]
+      if chosen:
+        minDist = np.full(len(points), np.inf, dtype=np.float32)
+        for hardIdx in hardOrder:
+          minDist = np.minimum(minDist, np.linalg.norm(points - points[hardIdx], axis=1))
+        minDist[hardOrder] = -1
+      else:
+        minDist = np.linalg.norm(points - points.mean(axis=0), axis=1)
+      while len(chosen) < perClass:
+        nextIdx = int(np.argmax(minDist))
+        chosen.append(members[nextIdx])
+        minDist = np.minimum(minDist, np.linalg.norm(points - points[nextIdx], axis=1))
+        minDist[nextIdx] = -1
+      selected.append(np.array(chosen))
+    return np.sort(np.concatenate(selected))
+def buildIndex(landmarks, labels, numClasses=None, numComponents=16):
+  return EmbeddingIndex(numComponents).fit(embedLandmarks(landmarks), labels, numClasses)
+def curateLandmarks(landmarks, labels, dedupRadius=0.0, perClass=None, hardFraction=0.3):
+  landmarks, labels = np.asarray(landmarks, dtype=np.float32), np.asarray(labels)
+  keep = np.arange(len(landmarks))
+  if dedupRadius > 0:
+    keep = buildIndex(landmarks, labels).dedupe(dedupRadius)
+    print(f"Removed {len(landmarks) - len(keep)} Near-Duplicates (Radius {dedupRadius})")
+  if perClass is not None:
+    index = buildIndex(landmarks[keep], labels[keep], int(labels.max()) + 1)
+    keep = keep[index.selectSamples(perClass, hardFraction)]
+    print(f"Selected {len(keep)} Diverse And Hard Samples ({perClass} Per Class)")
+  return landmarks[keep], labels[keep]
+def saveIndex(index, outputPath):
+  np.savez(outputPath, embeddings=index.embeddings, labels=index.labels, numClasses=index.numClasses, numComponents=index.numComponents)
+def loadIndex(indexPath):
+  with np.load(indexPath) as data:
+    return EmbeddingIndex(int(data['numComponents'])).fit(data['embeddings'], data['labels'], int(data['numClasses']))
+def syntheticPoses(numSamples, numClasses=26, jitter=0.02, seed=42):
+  rng = np.random.default_rng(seed)
+  labels = rng.integers(0, numClasses, numSamples)
+  landmarks = syntheticLandmarks(numClasses, seed)[labels] + rng.normal(0, jitter, (numSamples, 63))
+  return landmarks.astype(np.float32), labels
+def benchmarkIndex(numSamples=20000, numQueries=1000, k=10, seed=42):
+  landmarks, labels = syntheticPoses(numSamples + numQueries, seed=seed)
+  embeddings = embedLandmarks(landmarks)
+  start = time.perf_counter()
+  index = EmbeddingIndex().fit(embeddings[:numSamples], labels[:numSamples], 26)
+  buildSec = time.perf_counter() - start
+  queries = embeddings[numSamples:]
+  start = time.perf_counter()
+  _, approx = index.query(queries, k)
+  approxSec = time.perf_counter() - start
+  start = time.perf_counter()
+  squared = np.sum(queries * queries, axis=1)[:, None] + np.sum(embeddings[:numSamples] ** 2, axis=1)[None] - 2 * queries @ embeddings[:numSamples].T
+  exact = np.argsort(squared, axis=1)[:, :k]
+  exactSec = time.perf_counter() - start
+  recall = np.mean([len(np.intersect1d(a, e)) / k for a, e in zip(approx, exact)])
+  print(f"Samples: {numSamples}, Queries: {numQueries}, K: {k}")
+  print(f"Build: {buildSec * 1000:.1f}ms")
+  print(f"Index: {approxSec * 1e6 / numQueries:.1f}us/query")
+  print(f"Brute Force: {exactSec * 1e6 / numQueries:.1f}us/query")
+  print(f"Recall@{k}: {recall:.4f}")
+  return {'buildMs': buildSec * 1000, 'indexUs': approxSec * 1e6 / numQueries, 'bruteForceUs': exactSec * 1e6 / numQueries, 'recall': float(recall)}
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  buildParser = subparsers.add_parser("build")
+  buildParser.add_argument("--data", type=Path, default=Path(__file__).parent / "data" / "processed")
+  buildParser.add_argument("--output", type=Path, default=Path(__file__).parent / "savedModels" / INDEX_FILE)
+  buildParser.add_argument("--components", type=int, default=16)
+  reportParser = subparsers.add_parser("report")
+  reportParser.add_argument("--data", type=Path, default=Path(__file__).parent / "data" / "processed")
+  reportParser.add_argument("--radius", type=float, nargs="+", default=[0.01, 0.02, 0.05])
+  benchmarkParser = subparsers.add_parser("benchmark")
+  benchmarkParser.add_argument("--samples", type=int, default=20000)
+  benchmarkParser.add_argument("--k", type=int, default=10)
+  args = parser.parse_args()
+  if args.command == "benchmark":
+    benchmarkIndex(args.samples, k=args.k)
+  else:
+    landmarks, labels, header = loadLandmarkSet(args.data)
+    index = buildIndex(landmarks, labels, len(header['labelMap']), args.components if args.command == "build" else 16)
+    if args.command == "build":
+      args.output.parent.mkdir(parents=True, exist_ok=True)
+      saveIndex(index, args.output)
+      print(f"Indexed {len(labels)} Samples To {args.output}")
+    else:
+      report = {'samples': len(labels), 'duplicates': {str(radius): len(labels) - len(index.dedupe(radius)) for radius in args.radius}}
+      hardness = index.hardness()
+      report['hardSamples'] = int(np.sum(hardness > 0))
+      print(json.dumps(report, indent=2))
\ No newline at end of file
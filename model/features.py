@@ -0,0 +1,155 @@
+import hashlib
+import json
+import math
+import time
+import numpy as np
+FINGER_JOINTS = [[0,1,2,3,4], [0,5,6,7,8], [0,9,10,11,12], [0,13,14,15,16], [0,17,18,19,20]]
+KEY_POINTS = [0, 4, 8, 12, 16, 20]
+FINGER_BASES = [1, 5, 9, 13, 17]
+FINGER_TIPS = [4, 8, 12, 16, 20]
+ANGLE_TRIPLETS = np.array([finger[i:i+3] for finger in FINGER_JOINTS for i in range(len(FINGER_JOINTS[0])-2)])
+TIP_PAIRS = np.array([(FINGER_TIPS[i], FINGER_TIPS[j]) for i in range(5) for j in range(i+1, 5)])
+KEY_PAIRS = np.array([(KEY_POINTS[i], KEY_POINTS[j]) for i in range(len(KEY_POINTS)) for j in range(i+1, len(KEY_POINTS))])
+BASE_TIP_PAIRS = np.array(list(zip(FINGER_BASES, FINGER_TIPS)))
+RAW_DIM = 63
+ANGLE_DIM = len(ANGLE_TRIPLETS) + len(TIP_PAIRS)
+DISTANCE_DIM = len(KEY_PAIRS) + len(BASE_TIP_PAIRS) + len(FINGER_TIPS)
+COMBINED_DIM = RAW_DIM + ANGLE_DIM + DISTANCE_DIM
+FEATURE_SCHEMA = {
+  'version': 1,
+  'dtype': 'float32',
+  'epsilon': 1e-6,
+  'dims': {'raw': RAW_DIM, 'angles': ANGLE_DIM, 'distances': DISTANCE_DIM, 'combined': COMBINED_DIM},
+  'fingerJoints': FINGER_JOINTS,
+  'keyPoints': KEY_POINTS,
+  'fingerBases': FINGER_BASES,
+  'fingerTips': FINGER_TIPS
+}
+def featureSchemaHash():
+  return hashlib.blake2b(json.dumps(FEATURE_SCHEMA, sort_keys=True).encode(), digest_size=16).hexdigest()
+def extractRawFeatures(landmarks):
+  points = landmarks.reshape(21, 3)
+  wrist = points[0].copy()
+  centered = points - wrist
+  maxDist = np.max(np.linalg.norm(centered[1:, :2], axis=1)) + 1e-6
+  centered[:, :2] /= maxDist
+  return centered.flatten()
+def extractAngleFeatures(landmarks):
+  points = [(landmarks[i*3], landmarks[i*3+1]) for i in range(21)]
+  wrist = points[0]
+  maxDist = max(math.sqrt((p[0]-wrist[0])**2 + (p[1]-wrist[1])**2) for p in points[1:]) + 1e-6
+  normPoints = [((p[0]-wrist[0])/maxDist, (p[1]-wrist[1])/maxDist) for p in points]
+  def calcAngle(p1, p2, p3):
+    v1 = np.array([p1[0]-p2[0], p1[1]-p2[1]])
+    v2 = np.array([p3[0]-p2[0], p3[1]-p2[1]])
+    cos = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
+    return np.arccos(np.clip(cos, -1, 1)) / math.pi
+  angles = []
+  for finger in FINGER_JOINTS:
+    for i in range(len(finger)-2):
+      angles.append(calcAngle(normPoints[finger[i]], normPoints[finger[i+1]], normPoints[finger[i+2]]))
+  for i, finger1 in enumerate(FINGER_JOINTS):
+    for j, finger2 in enumerate(FINGER_JOINTS):
+      if i < j:
+        tip1, tip2 = normPoints[finger1[-1]], normPoints[finger2[-1]]
+        angles.append(math.sqrt((tip1[0]-tip2[0])**2 + (tip1[1]-tip2[1])**2))
+  return np.array(angles, dtype=np.float32)
+def extractDistanceFeatures(landmarks):
+  points = landmarks.reshape(21, 3)[:, :2]
+  wrist = points[0]
+  maxDist = np.max(np.linalg.norm(points[1:] - wrist, axis=1)) + 1e-6
+  normPoints = (points - wrist) / maxDist
+  distances = []
+  for i in range(len(KEY_POINTS)):
+    for j in range(i+1, len(KEY_POINTS)):
+      p1, p2 = normPoints[KEY_POINTS[i]], normPoints[KEY_POINTS[j]]
+      distances.append(np.linalg.norm(p1 - p2))
+  for base, tip in zip(FINGER_BASES, FINGER_TIPS):
+    distances.append(np.linalg.norm(normPoints[tip] - normPoints[base]))
+  for tip in FINGER_TIPS:
+    distances.append(normPoints[tip][1])
+  return np.array(distances, dtype=np.float32)
+def extractCombinedFeatures(landmarks):
+  raw = extractRawFeatures(landmarks)
+  angles = extractAngleFeatures(landmarks)
+  distances = extractDistanceFeatures(landmarks)
+  return np.concatenate([raw, angles, distances])
+def extractMultipleFeatureSets(landmarks):
+  features = {}
+  features['raw'] = extractRawFeatures(landmarks)
+  features['angles'] = extractAngleFeatures(landmarks)
+  features['distances'] = extractDistanceFeatures(landmarks)
+  features['combined'] = np.concatenate([features['raw'], features['angles'], features['distances']])
+  return features
+def toPointBatch(landmarks):
+  return np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+def pairNorm(a, b):
+  diff = a - b
+  return np.sqrt(diff[..., 0] * diff[..., 0] + diff[..., 1] * diff[..., 1])
+def extractRawFeaturesBatch(landmarks):
+  points = toPointBatch(landmarks)
+  centered = points - points[:, :1]
+  xy = centered[:, 1:, :2]
+  maxDist = np.max(np.sqrt(xy[..., 0] * xy[..., 0] + xy[..., 1] * xy[..., 1]), axis=1) + np.float32(1e-6)
+  centered[:, :, :2] /= maxDist[:, None, None]
+  return centered.reshape(len(centered), -1)
+def extractAngleFeaturesBatch(landmarks):
+  points = toPointBatch(landmarks)[:, :, :2]
+  centered = points - points[:, :1]
+  sq = centered[:, 1:, 0] * centered[:, 1:, 0] + centered[:, 1:, 1] * centered[:, 1:, 1]
+  maxDist = (np.max(np.sqrt(sq.astype(np.float64)), axis=1) + 1e-6).astype(np.float32)
+  normPoints = centered / maxDist[:, None, None]
+  v1 = normPoints[:, ANGLE_TRIPLETS[:, 0]] - normPoints[:, ANGLE_TRIPLETS[:, 1]]
+  v2 = normPoints[:, ANGLE_TRIPLETS[:, 2]] - normPoints[:, ANGLE_TRIPLETS[:, 1]]
+  dot = v1[..., 0] * v2[..., 0] + v1[..., 1] * v2[..., 1]
+  cos = dot / (pairNorm(v1, 0) * pairNorm(v2, 0) + np.float32(1e-6))
+  angles = np.arccos(np.clip(cos, -1, 1)) / np.float32(math.pi)
+  tipDiff = normPoints[:, TIP_PAIRS[:, 0]] - normPoints[:, TIP_PAIRS[:, 1]]
+  tipSq = tipDiff[..., 0] * tipDiff[..., 0] + tipDiff[..., 1] * tipDiff[..., 1]
+  tipDist = np.sqrt(tipSq.astype(np.float64)).astype(np.float32)
+  return np.concatenate([angles, tipDist], axis=1)
+def extractDistanceFeaturesBatch(landmarks):
+  points = toPointBatch(landmarks)[:, :, :2]
+  centered = points - points[:, :1]
+  maxDist = np.max(pairNorm(centered[:, 1:], 0), axis=1) + np.float32(1e-6)
+  normPoints = centered / maxDist[:, None, None]
+  keyDist = pairNorm(normPoints[:, KEY_PAIRS[:, 0]], normPoints[:, KEY_PAIRS[:, 1]])
+  fingerDist = pairNorm(normPoints[:, BASE_TIP_PAIRS[:, 1]], normPoints[:, BASE_TIP_PAIRS[:, 0]])
+  tipHeights = normPoints[:, FINGER_TIPS, 1]
+  return np.concatenate([keyDist, fingerDist, tipHeights], axis=1)
+def extractCombinedFeaturesBatch(landmarks):
+  return np.concatenate([
+    extractRawFeaturesBatch(landmarks),
+    extractAngleFeaturesBatch(landmarks),
+    extractDistanceFeaturesBatch(landmarks)
+  ], axis=1)
+def extractMultipleFeatureSetsBatch(landmarks):
+  features = {}
+  features['raw'] = extractRawFeaturesBatch(landmarks)
+  features['angles'] = extractAngleFeaturesBatch(landmarks)
+  features['distances'] = extractDistanceFeaturesBatch(landmarks)
+  features['combined'] = np.concatenate([features['raw'], features['angles'], features['distances']], axis=1)
+  return features
+def syntheticLandmarks(numSamples, seed=42):
+  rng = np.random.default_rng(seed)
+  base = rng.uniform(0.2, 0.8, (numSamples, 1, 3))
+  offsets = rng.normal(0, 0.1, (numSamples, 21, 3))
+  return (base + offsets).reshape(numSamples, RAW_DIM).astype(np.float32)
+def benchmarkFeatures(numSamples=20000, seed=42):
+  landmarks = syntheticLandmarks(numSamples, seed)
+  start = time.perf_counter()
+  reference = np.stack([extractCombinedFeatures(lm) for lm in landmarks])
+  perSampleTime = time.perf_counter() - start
+  start = time.perf_counter()
+  batched = extractCombinedFeaturesBatch(landmarks)
+  batchTime = time.perf_counter() - start
+  identical = reference.dtype == batched.dtype and np.array_equal(reference, batched)
+  differing = int(np.sum(reference != batched))
+  print(f"Samples: {numSamples}, Features: {batched.shape[1]}")
+  print(f"Per-Sample: {numSamples / perSampleTime:,.0f} samples/sec")
+  print(f"Batched: {numSamples / batchTime:,.0f} samples/sec")
+  print(f"Speedup: {perSampleTime / batchTime:.1f}x")
+  print(f"Output Identical: {identical} ({differing:,}/{reference.size:,} Values Differ, Max Abs Diff: {np.max(np.abs(reference - batched)):.3g})")
+  return {'perSample': numSamples / perSampleTime, 'batched': numSamples / batchTime, 'identical': bool(identical), 'differingValues': differing, 'maxAbsDiff': float(np.max(np.abs(reference - batched)))}
+if __name__ == "__main__":
+  benchmarkFeatures()
\ No newline at end of file
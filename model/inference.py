@@ -1,130 +1,320 @@
 import warnings
-import math
-import cv2
+import argparse
+import threading
+import time
 import os
-import tensorflow as tf
 import numpy as np
-from mediapipe.tasks.python import vision
-from mediapipe import Image, ImageFormat
-from mediapipe.tasks import python
-from collections import Counter
+from collections import deque
 from pathlib import Path
+from features import extractCombinedFeaturesBatch
+from quantization import dequantizeOutput, quantizeInput
+from modelBundle import MANIFEST_FILE, artifactPaths, checkManifest, loadLabelMap, loadScalerParams
+from tfliteRuntime import modelKey, sharedInterpreter
+from instrumentation import DISABLED, Instrumentation, PeriodicExporter, serveMetrics
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings('ignore')
-def extractRawFeatures(landmarks):
-  points = landmarks.reshape(21, 3)
-  wrist = points[0].copy()
-  centered = points - wrist
-  maxDist = np.max(np.linalg.norm(centered[1:, :2], axis=1)) + 1e-6
-  centered[:, :2] /= maxDist
-  return centered.flatten()
-def extractAngleFeatures(landmarks):
-  points = [(landmarks[i*3], landmarks[i*3+1]) for i in range(21)]
-  wrist = points[0]
-  maxDist = max(math.sqrt((p[0]-wrist[0])**2 + (p[1]-wrist[1])**2) for p in points[1:]) + 1e-6
-  normPoints = [((p[0]-wrist[0])/maxDist, (p[1]-wrist[1])/maxDist) for p in points]
-  def calcAngle(p1, p2, p3):
-    v1 = np.array([p1[0]-p2[0], p1[1]-p2[1]])
-    v2 = np.array([p3[0]-p2[0], p3[1]-p2[1]])
-    cos = np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2) + 1e-6)
-    return np.arccos(np.clip(cos, -1, 1)) / math.pi
-  fingerJoints = [[0,1,2,3,4], [0,5,6,7,8], [0,9,10,11,12], [0,13,14,15,16], [0,17,18,19,20]]
-  angles = []
-  for finger in fingerJoints:
-    for i in range(len(finger)-2):
-      angles.append(calcAngle(normPoints[finger[i]], normPoints[finger[i+1]], normPoints[finger[i+2]]))
-  for i, finger1 in enumerate(fingerJoints):
-    for j, finger2 in enumerate(fingerJoints):
-      if i < j:
-        tip1, tip2 = normPoints[finger1[-1]], normPoints[finger2[-1]]
-        angles.append(math.sqrt((tip1[0]-tip2[0])**2 + (tip1[1]-tip2[1])**2))
-  return np.array(angles, dtype=np.float32)
-def extractDistanceFeatures(landmarks):
-  points = landmarks.reshape(21, 3)[:, :2]
-  wrist = points[0]
-  maxDist = np.max(np.linalg.norm(points[1:] - wrist, axis=1)) + 1e-6
-  normPoints = (points - wrist) / maxDist
-  keyPoints = [0, 4, 8, 12, 16, 20]
-  distances = []
-  for i in range(len(keyPoints)):
-    for j in range(i+1, len(keyPoints)):
-      p1, p2 = normPoints[keyPoints[i]], normPoints[keyPoints[j]]
-      distances.append(np.linalg.norm(p1 - p2))
-  fingerBases = [1, 5, 9, 13, 17]
-  fingerTips = [4, 8, 12, 16, 20]
-  for base, tip in zip(fingerBases, fingerTips):
-    distances.append(np.linalg.norm(normPoints[tip] - normPoints[base]))
-  for tip in fingerTips:
-    distances.append(normPoints[tip][1])
-  return np.array(distances, dtype=np.float32)
-def extractCombinedFeatures(landmarks):
-  raw = extractRawFeatures(landmarks)
-  angles = extractAngleFeatures(landmarks)
-  distances = extractDistanceFeatures(landmarks)
-  return np.concatenate([raw, angles, distances])
-class SignPredictor:
-  def __init__(self, modelPath, scalerParamsPath, labelMapPath):
+class SignClassifier:
+  def __init__(self, modelPath, scalerParamsPath, labelMapPath, metrics=None):
+    self.metrics = metrics or DISABLED
     try:
-      self.interpreter = tf.lite.Interpreter(model_path=str(modelPath))
-      self.interpreter.allocate_tensors()
+      with open(modelPath, "rb") as f:
+        self.modelContent = f.read()
+      self.modelKey = modelKey(self.modelContent)
+      self.interpreter = self.getInterpreter(1)
       self.inputDetails = self.interpreter.get_input_details()
       self.outputDetails = self.interpreter.get_output_details()
     except Exception as e:
       print(f"Error Loading TFLite Model: {e}")
       raise
-    self.scalerParams = np.load(scalerParamsPath, allow_pickle=True).item()
-    self.labelMap = np.load(labelMapPath, allow_pickle=True).item()
+    self.scalerParams = loadScalerParams(scalerParamsPath)
+    self.labelMap = loadLabelMap(labelMapPath)
     self.labelList = {v: k for k, v in self.labelMap.items()}
-    handModelPath = Path(__file__).parent / "data" / "hand_landmarker.task"
-    baseOptions = python.BaseOptions(model_asset_path=str(handModelPath))
-    options = vision.HandLandmarkerOptions(
-      base_options=baseOptions,
-      num_hands=1,
-      min_hand_detection_confidence=0.7,
-      min_tracking_confidence=0.5
-    )
-    self.detector = vision.HandLandmarker.create_from_options(options)
-    self.history = []
-    self.historySize = 5
-    self.confidenceHistory = []
-  def extractLandmarks(self, frame):
-    frameRgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    mpImage = Image(image_format=ImageFormat.SRGB, data=frameRgb)
-    results = self.detector.detect(mpImage)
-    if results.hand_landmarks and len(results.hand_landmarks) > 0:
-      handLandmarks = results.hand_landmarks[0]
-      landmarks = []
-      for lm in handLandmarks:
-        landmarks.extend([lm.x, lm.y, lm.z])
-      return np.array(landmarks, dtype=np.float32), results.hand_landmarks[0]
-    return None, None
-  def predict(self, landmarks):
-    features = extractCombinedFeatures(landmarks).reshape(1, -1)
-    featuresScaled = (features - self.scalerParams['mean']) / self.scalerParams['scale']
-    featuresScaled = featuresScaled.astype(np.float32)
-    self.interpreter.set_tensor(self.inputDetails[0]['index'], featuresScaled)
-    self.interpreter.invoke()
-    probas = self.interpreter.get_tensor(self.outputDetails[0]['index'])[0]
-    predictedIdx = np.argmax(probas)
-    confidence = float(probas[predictedIdx])
-    self.history.append(predictedIdx)
-    self.confidenceHistory.append(confidence)
-    if len(self.history) > self.historySize:
-      self.history.pop(0)
-      self.confidenceHistory.pop(0)
-    if len(self.history) >= 3:
-      counter = Counter(self.history)
-      mostCommon, count = counter.most_common(1)[0]
-      if count >= 3:
+    manifestPath = Path(modelPath).with_name(MANIFEST_FILE)
+    if manifestPath.exists():
+      checkManifest(manifestPath)
+  def getInterpreter(self, batchSize):
+    return sharedInterpreter(self.modelContent, batchSize, self.modelKey)
+  def scaleFeatures(self, features):
+    if self.scalerParams.get('folded'):
+      return np.asarray(features, dtype=np.float32)
+    return ((features - self.scalerParams['mean']) / self.scalerParams['scale']).astype(np.float32)
+  def classifyBatch(self, landmarks):
+    with self.metrics.timer('features'):
+      features = extractCombinedFeaturesBatch(landmarks)
+    with self.metrics.timer('scale'):
+      featuresScaled = self.scaleFeatures(features)
+    numSamples = len(featuresScaled)
+    bucket = 1 << (numSamples - 1).bit_length()
+    if bucket != numSamples:
+      featuresScaled = np.concatenate([featuresScaled, np.zeros((bucket - numSamples, featuresScaled.shape[1]), dtype=np.float32)])
+    interpreter = self.getInterpreter(bucket)
+    interpreter.set_tensor(self.inputDetails[0]['index'], quantizeInput(featuresScaled, self.inputDetails[0]))
+    with self.metrics.timer('invoke'):
+      interpreter.invoke()
+    return dequantizeOutput(interpreter.get_tensor(self.outputDetails[0]['index'])[:numSamples], self.outputDetails[0])
+class PredictionSmoother:
+  def __init__(self, historySize=5, minVotes=3):
+    self.historySize = historySize
+    self.minVotes = minVotes
+    self.reset()
+  def reset(self):
+    self.history = [0] * self.historySize
+    self.confidenceHistory = [0.0] * self.historySize
+    self.position = 0
+    self.size = 0
+    self.votes = {}
+    self.confidenceSums = {}
+  def update(self, predictedIdx, confidence):
+    if self.size == self.historySize:
+      oldIdx = self.history[self.position]
+      self.votes[oldIdx] -= 1
+      self.confidenceSums[oldIdx] -= self.confidenceHistory[self.position]
+      if self.votes[oldIdx] == 0:
+        del self.votes[oldIdx]
+        del self.confidenceSums[oldIdx]
+    else:
+      self.size += 1
+    self.history[self.position] = predictedIdx
+    self.confidenceHistory[self.position] = confidence
+    self.position = (self.position + 1) % self.historySize
+    self.votes[predictedIdx] = self.votes.get(predictedIdx, 0) + 1
+    self.confidenceSums[predictedIdx] = self.confidenceSums.get(predictedIdx, 0.0) + confidence
+    if self.size >= self.minVotes:
+      mostCommon = max(self.votes, key=self.votes.get)
+      count = self.votes[mostCommon]
+      if count >= self.minVotes:
         predictedIdx = mostCommon
-        relevantConf = [c for i, c in zip(self.history, self.confidenceHistory) if i == mostCommon]
-        confidence = np.mean(relevantConf)
+        confidence = self.confidenceSums[mostCommon] / count
+    return predictedIdx, confidence
+class TemporalGate:
+  def __init__(self, deltaThreshold=0.01, refreshIntervalMs=250):
+    self.deltaThreshold = deltaThreshold
+    self.refreshIntervalMs = refreshIntervalMs
+    self.frames = 0
+    self.refreshes = 0
+    self.references = {}
+    self.lastRefreshMs = {}
+  def reset(self, key=None):
+    if key is None:
+      self.references.clear()
+      self.lastRefreshMs.clear()
+    else:
+      self.references.pop(key, None)
+      self.lastRefreshMs.pop(key, None)
+  def landmarkDelta(self, landmarks, reference):
+    return float(np.mean(np.linalg.norm((landmarks - reference).reshape(-1, 3), axis=1)))
+  def shouldRefresh(self, landmarks, timestampMs, force=False, key=0):
+    self.frames += 1
+    reference = self.references.get(key)
+    if not force and reference is not None and timestampMs - self.lastRefreshMs[key] < self.refreshIntervalMs and self.landmarkDelta(landmarks, reference) < self.deltaThreshold:
+      return False
+    self.references[key] = np.array(landmarks, dtype=np.float32)
+    self.lastRefreshMs[key] = timestampMs
+    self.refreshes += 1
+    return True
+  def summary(self):
+    return f"Classifier Ran On {self.refreshes}/{self.frames} Hands ({self.refreshes / max(self.frames, 1):.0%})"
+class HandTrack:
+  def __init__(self, trackId, center, historySize=5):
+    self.trackId = trackId
+    self.center = center
+    self.smoother = PredictionSmoother(historySize)
+    self.lastPrediction = None
+    self.missedFrames = 0
+class HandTracker:
+  def __init__(self, maxDistance=0.15, maxMissedFrames=5, historySize=5):
+    self.maxDistance = maxDistance
+    self.maxMissedFrames = maxMissedFrames
+    self.historySize = historySize
+    self.tracks = {}
+    self.nextId = 0
+  def update(self, landmarksBatch):
+    centers = np.asarray(landmarksBatch, dtype=np.float32).reshape(-1, 21, 3)[:, :, :2].mean(axis=1)
+    trackIds = list(self.tracks)
+    assigned = [None] * len(centers)
+    if trackIds and len(centers):
+      trackCenters = np.stack([self.tracks[trackId].center for trackId in trackIds])
+      distances = np.linalg.norm(trackCenters[:, None] - centers[None], axis=2)
+      usedTracks = set()
+      for flatIdx in np.argsort(distances, axis=None):
+        trackIdx, handIdx = divmod(int(flatIdx), len(centers))
+        if distances[trackIdx, handIdx] > self.maxDistance:
+          break
+        if trackIdx in usedTracks or assigned[handIdx] is not None:
+          continue
+        usedTracks.add(trackIdx)
+        assigned[handIdx] = self.tracks[trackIds[trackIdx]]
+    for handIdx, center in enumerate(centers):
+      if assigned[handIdx] is None:
+        assigned[handIdx] = self.tracks[self.nextId] = HandTrack(self.nextId, center, self.historySize)
+        self.nextId += 1
+      assigned[handIdx].center = center
+      assigned[handIdx].missedFrames = 0
+    seen = {track.trackId for track in assigned}
+    expired = []
+    for trackId, track in list(self.tracks.items()):
+      if trackId not in seen:
+        track.missedFrames += 1
+        if track.missedFrames > self.maxMissedFrames:
+          del self.tracks[trackId]
+          expired.append(trackId)
+    return assigned, expired
+class SignPredictor(SignClassifier):
+  def __init__(self, modelPath, scalerParamsPath, labelMapPath, videoMode=False, metrics=None, lowConfidence=0.5, temporalGate=None, numHands=1, knnIndex=None, knnAgreement=0.8):
+    super().__init__(modelPath, scalerParamsPath, labelMapPath, metrics)
+    self.lowConfidence = lowConfidence
+    self.knnIndex = knnIndex
+    self.knnAgreement = knnAgreement
+    self.temporalGate = temporalGate
+    self.lastPrediction = None
+    self.handModelPath = Path(__file__).parent / "data" / "hand_landmarker.task"
+    self.detector = None
+    self.videoMode = videoMode
+    self.lastTimestampMs = -1
+    self.smoother = PredictionSmoother()
+    self.numHands = numHands
+    self.tracker = HandTracker()
+  def getDetector(self):
+    if self.detector is None:
+      from mediapipe.tasks import python
+      from mediapipe.tasks.python import vision
+      baseOptions = python.BaseOptions(model_asset_path=str(self.handModelPath))
+      options = vision.HandLandmarkerOptions(
+        base_options=baseOptions,
+        running_mode=vision.RunningMode.VIDEO if self.videoMode else vision.RunningMode.IMAGE,
+        num_hands=self.numHands,
+        min_hand_detection_confidence=0.7,
+        min_tracking_confidence=0.5
+      )
+      self.detector = vision.HandLandmarker.create_from_options(options)
+    return self.detector
+  def detectHands(self, frame, timestampMs=None):
+    import cv2
+    from mediapipe import Image, ImageFormat
+    detector = self.getDetector()
+    self.metrics.increment('frames')
+    with self.metrics.timer('colorConvert'):
+      frameRgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+      mpImage = Image(image_format=ImageFormat.SRGB, data=frameRgb)
+    with self.metrics.timer('detect'):
+      if self.videoMode:
+        if timestampMs is None:
+          timestampMs = time.monotonic() * 1000
+        self.lastTimestampMs = max(int(timestampMs), self.lastTimestampMs + 1)
+        results = detector.detect_for_video(mpImage, self.lastTimestampMs)
+      else:
+        results = detector.detect(mpImage)
+    handLandmarks = results.hand_landmarks or []
+    landmarks = np.array([[v for lm in hand for v in (lm.x, lm.y, lm.z)] for hand in handLandmarks], dtype=np.float32).reshape(-1, 63)
+    self.metrics.increment('hands', len(landmarks))
+    if not len(landmarks):
+      self.metrics.increment('noHand')
+    return landmarks, handLandmarks
+  def resetPrediction(self):
+    self.lastPrediction = None
+  def extractLandmarks(self, frame, timestampMs=None):
+    landmarks, handLandmarks = self.detectHands(frame, timestampMs)
+    if not len(landmarks):
+      self.resetPrediction()
+      return None, None
+    return landmarks[0], handLandmarks[0]
+  def knnFallback(self, landmarksBatch, probas):
+    if self.knnIndex is None:
+      return probas
+    uncertain = np.flatnonzero(probas.max(axis=1) < self.lowConfidence)
+    if len(uncertain):
+      from embeddingIndex import embedLandmarks
+      with self.metrics.timer('knn'):
+        knnProbas, supported = self.knnIndex.vote(embedLandmarks(landmarksBatch[uncertain]))
+      agreed = supported & (knnProbas.max(axis=1) >= self.knnAgreement)
+      probas = probas.copy()
+      probas[uncertain[agreed]] = knnProbas[agreed]
+      self.metrics.increment('knnFallback', int(agreed.sum()))
+    return probas
+  def predict(self, landmarks, timestampMs=None):
+    if self.temporalGate is not None:
+      if timestampMs is None:
+        timestampMs = time.monotonic() * 1000
+      lastPrediction = self.lastPrediction
+      if not self.temporalGate.shouldRefresh(landmarks, timestampMs, force=lastPrediction is None):
+        self.metrics.increment('reusedPredictions')
+        return lastPrediction
+    probas = self.knnFallback(landmarks.reshape(1, -1), self.classifyBatch(landmarks.reshape(1, -1)))[0]
+    predictedIdx = int(np.argmax(probas))
+    predictedIdx, confidence = self.smoother.update(predictedIdx, float(probas[predictedIdx]))
+    if confidence < self.lowConfidence:
+      self.metrics.increment('lowConfidence')
     predictedLabel = self.labelList.get(predictedIdx, "Unknown")
-    return predictedLabel, confidence
+    self.lastPrediction = predictedLabel, confidence
+    return self.lastPrediction
+  def predictHands(self, landmarksBatch, timestampMs=None):
+    if self.numHands == 1:
+      if not len(landmarksBatch):
+        self.resetPrediction()
+      return [(0, *self.predict(landmarks, timestampMs)) for landmarks in landmarksBatch[:1]]
+    tracks, expired = self.tracker.update(landmarksBatch)
+    if self.temporalGate is not None:
+      for trackId in expired:
+        self.temporalGate.reset(trackId)
+      if timestampMs is None:
+        timestampMs = time.monotonic() * 1000
+      refresh = [self.temporalGate.shouldRefresh(lm, timestampMs, track.lastPrediction is None, track.trackId) for lm, track in zip(landmarksBatch, tracks)]
+    else:
+      refresh = [True] * len(tracks)
+    toClassify = [i for i, needed in enumerate(refresh) if needed]
+    if len(toClassify) < len(tracks):
+      self.metrics.increment('reusedPredictions', len(tracks) - len(toClassify))
+    if toClassify:
+      batch = np.asarray(landmarksBatch)[toClassify]
+      probas = self.knnFallback(batch, self.classifyBatch(batch))
+      for i, row in zip(toClassify, probas):
+        predictedIdx = int(np.argmax(row))
+        predictedIdx, confidence = tracks[i].smoother.update(predictedIdx, float(row[predictedIdx]))
+        if confidence < self.lowConfidence:
+          self.metrics.increment('lowConfidence')
+        tracks[i].lastPrediction = self.labelList.get(predictedIdx, "Unknown"), confidence
+    return [(track.trackId, *track.lastPrediction) for track in tracks]
   def release(self):
-    pass
+    if self.detector is not None:
+      self.detector.close()
+      self.detector = None
+class LatestQueue:
+  def __init__(self):
+    self.item = None
+    self.closed = False
+    self.dropped = 0
+    self.condition = threading.Condition()
+  def put(self, item):
+    with self.condition:
+      if self.item is not None:
+        self.dropped += 1
+      self.item = item
+      self.condition.notify()
+  def get(self, timeout=None):
+    with self.condition:
+      self.condition.wait_for(lambda: self.item is not None or self.closed, timeout)
+      item, self.item = self.item, None
+      return item
+  def close(self):
+    with self.condition:
+      self.closed = True
+      self.condition.notify_all()
+class StageTimings:
+  def __init__(self, stages, windowSize=60):
+    self.stages = stages
+    self.samples = {stage: deque(maxlen=windowSize) for stage in stages}
+    self.lock = threading.Lock()
+  def record(self, stage, seconds):
+    with self.lock:
+      self.samples[stage].append(seconds)
+  def means(self):
+    with self.lock:
+      return {stage: (sum(values) / len(values) * 1000 if values else 0.0) for stage, values in self.samples.items()}
+  def summary(self):
+    return " | ".join(f"{stage} {ms:.1f}ms" for stage, ms in self.means().items())
 def drawLandmarks(frame, landmarks):
+  import cv2
   h, w, _ = frame.shape
   connections = [
     (0,1),(1,2),(2,3),(3,4),(0,5),(5,6),(6,7),(7,8),
@@ -138,40 +328,173 @@ def drawLandmarks(frame, landmarks):
     cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
   for start, end in connections:
     cv2.line(frame, points[start], points[end], (0, 255, 0), 2)
-def runDemo():
-  modelPath = Path(__file__).parent / "savedModels" / "saslModel.tflite"
-  scalerParamsPath = Path(__file__).parent / "savedModels" / "scalerParams.npy"
-  labelMapPath = Path(__file__).parent / "savedModels" / "labelMap.npy"
+def confidenceColor(confidence):
+  if confidence > 0.7:
+    return (0, 255, 0)
+  elif confidence > 0.5:
+    return (0, 165, 255)
+  return (0, 0, 255)
+def drawPredictions(frame, handLandmarks, predictions):
+  import cv2
+  h, w, _ = frame.shape
+  for hand, (trackId, label, confidence) in zip(handLandmarks, predictions):
+    drawLandmarks(frame, hand)
+    x, y = int(hand[0].x * w), int(hand[0].y * h)
+    cv2.putText(frame, f"#{trackId} {label}: {confidence:.0%}", (max(x - 60, 10), min(y + 40, h - 40)), cv2.FONT_HERSHEY_SIMPLEX, 1.0, confidenceColor(confidence), 2)
+def loadPredictor(videoMode=False, metrics=None, temporalGate=None, numHands=1, knnFallback=False):
+  modelDir = Path(__file__).parent / "savedModels"
+  modelPath, scalerParamsPath, labelMapPath = artifactPaths(modelDir)
   if not modelPath.exists():
     print("Model Not Found! Please Train First!")
     print("1. python data/extractLandmarks.py")
     print("2. python trainEnsemble.py")
     print("3. python trainTflite.py")
+    return None
+  knnIndex = None
+  if knnFallback:
+    from embeddingIndex import INDEX_FILE, loadIndex
+    if (modelDir / INDEX_FILE).exists():
+      knnIndex = loadIndex(modelDir / INDEX_FILE)
+    else:
+      print("Embedding Index Not Found, Run python embeddingIndex.py build To Enable kNN Fallback")
+  return SignPredictor(modelPath, scalerParamsPath, labelMapPath, videoMode=videoMode, metrics=metrics, temporalGate=temporalGate, numHands=numHands, knnIndex=knnIndex)
+def runDemo(source=0, headless=False, metrics=None, temporalGate=None, numHands=1, knnFallback=False):
+  import cv2
+  predictor = loadPredictor(metrics=metrics, temporalGate=temporalGate, numHands=numHands, knnFallback=knnFallback)
+  if predictor is None:
     return
-  predictor = SignPredictor(modelPath, scalerParamsPath, labelMapPath)
-  cap = cv2.VideoCapture(0)
-  print("Press 'Q' To Quit!")
+  cap = cv2.VideoCapture(source)
+  if not headless:
+    print("Press 'Q' To Quit!")
   while cap.isOpened():
     ret, frame = cap.read()
     if not ret:
       break
-    frame = cv2.flip(frame, 1)
-    landmarks, handLandmarks = predictor.extractLandmarks(frame)
-    if landmarks is not None:
-      label, confidence = predictor.predict(landmarks)
-      if confidence > 0.7:
-        color = (0, 255, 0)
-      elif confidence > 0.5:
-        color = (0, 165, 255)
-      else:
-        color = (0, 0, 255)
-      cv2.putText(frame, f"{label}: {confidence:.0%}", (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3)
-      drawLandmarks(frame, handLandmarks)
+    if source == 0:
+      frame = cv2.flip(frame, 1)
+    landmarks, handLandmarks = predictor.detectHands(frame)
+    predictions = predictor.predictHands(landmarks)
+    if not headless:
+      drawPredictions(frame, handLandmarks, predictions)
+    if headless:
+      continue
     cv2.imshow("ASL Sign Recognition", frame)
     if cv2.waitKey(1) & 0xFF == ord('q'):
       break
   cap.release()
+  if not headless:
+    cv2.destroyAllWindows()
+  if temporalGate is not None:
+    print(temporalGate.summary())
+  predictor.release()
+def captureLoop(cap, frames, stopEvent, timings, mirror=True):
+  import cv2
+  while not stopEvent.is_set() and cap.isOpened():
+    start = time.perf_counter()
+    ret, frame = cap.read()
+    if not ret:
+      break
+    if mirror:
+      frame = cv2.flip(frame, 1)
+    timings.record('capture', time.perf_counter() - start)
+    frames.put((frame, time.monotonic() * 1000, start))
+  stopEvent.set()
+  frames.close()
+def detectLoop(predictor, frames, detections, stopEvent, timings):
+  handsLost = 0
+  while not stopEvent.is_set():
+    item = frames.get(timeout=0.5)
+    if item is None:
+      continue
+    frame, timestampMs, capturedAt = item
+    start = time.perf_counter()
+    landmarks, handLandmarks = predictor.detectHands(frame, timestampMs)
+    timings.record('detect', time.perf_counter() - start)
+    if not len(landmarks):
+      handsLost += 1
+    detections.put((frame, landmarks, handLandmarks, timestampMs, capturedAt, handsLost))
+  detections.close()
+def runPipelinedDemo(source=0, logInterval=5.0, metrics=None, temporalGate=None, numHands=1, knnFallback=False):
+  import cv2
+  predictor = loadPredictor(videoMode=True, metrics=metrics, temporalGate=temporalGate, numHands=numHands, knnFallback=knnFallback)
+  if predictor is None:
+    return
+  cap = cv2.VideoCapture(source)
+  frames = LatestQueue()
+  detections = LatestQueue()
+  stopEvent = threading.Event()
+  timings = StageTimings(['capture', 'detect', 'classify', 'render', 'latency'])
+  workers = [
+    threading.Thread(target=captureLoop, args=(cap, frames, stopEvent, timings, source == 0), daemon=True),
+    threading.Thread(target=detectLoop, args=(predictor, frames, detections, stopEvent, timings), daemon=True)
+  ]
+  for worker in workers:
+    worker.start()
+  print("Press 'Q' To Quit!")
+  lastLog = time.perf_counter()
+  numFrames = 0
+  numHandsSeen = 0
+  handsLost = 0
+  while not stopEvent.is_set():
+    item = detections.get(timeout=0.5)
+    if item is None:
+      continue
+    frame, landmarks, handLandmarks, timestampMs, capturedAt, lostCount = item
+    if lostCount != handsLost:
+      handsLost = lostCount
+      predictor.resetPrediction()
+    start = time.perf_counter()
+    predictions = predictor.predictHands(landmarks, timestampMs)
+    if predictions:
+      timings.record('classify', time.perf_counter() - start)
+    drawPredictions(frame, handLandmarks, predictions)
+    renderStart = time.perf_counter()
+    cv2.putText(frame, timings.summary(), (10, frame.shape[0] - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+    cv2.imshow("ASL Sign Recognition", frame)
+    key = cv2.waitKey(1) & 0xFF
+    now = time.perf_counter()
+    timings.record('render', now - renderStart)
+    timings.record('latency', now - capturedAt)
+    numFrames += 1
+    numHandsSeen += len(predictions)
+    if now - lastLog >= logInterval:
+      print(f"{numFrames / (now - lastLog):.1f} FPS | {numHandsSeen / numFrames:.2f} Hands/Frame | {timings.summary()} | Dropped {frames.dropped + detections.dropped}")
+      lastLog = now
+      numFrames = 0
+      numHandsSeen = 0
+    if key == ord('q'):
+      break
+  stopEvent.set()
+  for worker in workers:
+    worker.join()
+  cap.release()
   cv2.destroyAllWindows()
+  if temporalGate is not None:
+    print(temporalGate.summary())
   predictor.release()
 if __name__ == "__main__":
-  runDemo()
\ No newline at end of file
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--pipelined", action="store_true")
+  parser.add_argument("--source", default="0")
+  parser.add_argument("--headless", action="store_true")
+  parser.add_argument("--metrics-out", type=Path, default=None)
+  parser.add_argument("--metrics-port", type=int, default=None)
+  parser.add_argument("--metrics-interval", type=float, default=5.0)
+  parser.add_argument("--temporal", action="store_true")
+  parser.add_argument("--delta-threshold", type=float, default=0.01)
+  parser.add_argument("--refresh-ms", type=float, default=250)
+  parser.add_argument("--num-hands", type=int, default=1)
+  parser.add_argument("--knn-fallback", action="store_true")
+  args = parser.parse_args()
+  temporalGate = TemporalGate(args.delta_threshold, args.refresh_ms) if args.temporal else None
+  source = int(args.source) if args.source.isdigit() else args.source
+  metrics = Instrumentation() if args.metrics_out or args.metrics_port else None
+  exporter = PeriodicExporter(metrics, args.metrics_out, args.metrics_interval).start() if args.metrics_out else None
+  if args.metrics_port:
+    serveMetrics(metrics, args.metrics_port)
+  if args.pipelined:
+    runPipelinedDemo(source, metrics=metrics, temporalGate=temporalGate, numHands=args.num_hands, knnFallback=args.knn_fallback)
+  else:
+    runDemo(source, args.headless, metrics, temporalGate, args.num_hands, args.knn_fallback)
+  if exporter is not None:
+    exporter.stop()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import argparse
+import json
+import queue
+import threading
+import time
+import numpy as np
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from modelBundle import artifactPaths
+from inference import PredictionSmoother, SignClassifier
+class MicroBatcher:
+  def __init__(self, classifier, maxBatchSize=64, maxLatencyMs=5.0, historySize=5, maxStreams=10000, streamIdleSec=300.0):
+    self.classifier = classifier
+    self.maxBatchSize = maxBatchSize
+    self.maxLatency = maxLatencyMs / 1000
+    self.historySize = historySize
+    self.requests = queue.Queue()
+    self.maxStreams = maxStreams
+    self.streamIdleSec = streamIdleSec
+    self.smoothers = OrderedDict()
+    self.lastSeen = {}
+    self.smootherLock = threading.Lock()
+    self.batchSizes = []
+    self.running = False
+    self.thread = None
+  def start(self):
+    self.running = True
+    self.thread = threading.Thread(target=self.run, daemon=True)
+    self.thread.start()
+    return self
+  def stop(self):
+    self.running = False
+    self.requests.put(None)
+    if self.thread is not None:
+      self.thread.join()
+  def submit(self, streamId, landmarks):
+    future = Future()
+    self.requests.put((streamId, np.asarray(landmarks, dtype=np.float32).reshape(63), future))
+    return future
+  def resetStream(self, streamId):
+    with self.smootherLock:
+      self.smoothers.pop(streamId, None)
+      self.lastSeen.pop(streamId, None)
+  def evictStreams(self, now):
+    while self.smoothers:
+      streamId = next(iter(self.smoothers))
+      if len(self.smoothers) <= self.maxStreams and now - self.lastSeen[streamId] <= self.streamIdleSec:
+        break
+      del self.smoothers[streamId]
+      del self.lastSeen[streamId]
+  def collectBatch(self):
+    first = self.requests.get()
+    if first is None:
+      return []
+    batch = [first]
+    deadline = time.perf_counter() + self.maxLatency
+    while len(batch) < self.maxBatchSize:
+      remaining = deadline - time.perf_counter()
+      if remaining <= 0:
+        break
+      try:
+        request = self.requests.get(timeout=remaining)
+      except queue.Empty:
+        break
+      if request is None:
+        self.running = False
+        break
+      batch.append(request)
+    return batch
+  def run(self):
+    while self.running:
+      batch = self.collectBatch()
+      if not batch:
+        continue
+      try:
+        probas = self.classifier.classifyBatch(np.stack([landmarks for _, landmarks, _ in batch]))
+      except Exception as e:
+        for _, _, future in batch:
+          future.set_exception(e)
+        continue
+      self.batchSizes.append(len(batch))
+      predictedIdx = np.argmax(probas, axis=1)
+      now = time.monotonic()
+      with self.smootherLock:
+        for (streamId, _, future), idx, row in zip(batch, predictedIdx, probas):
+          if streamId in self.smoothers:
+            self.smoothers.move_to_end(streamId)
+          else:
+            self.smoothers[streamId] = PredictionSmoother(self.historySize)
+          self.lastSeen[streamId] = now
+          smoother = self.smoothers[streamId]
+          smoothedIdx, confidence = smoother.update(int(idx), float(row[idx]))
+          future.set_result({
+            'streamId': streamId,
+            'label': self.classifier.labelList.get(smoothedIdx, "Unknown"),
+            'confidence': float(confidence),
+            'batchSize': len(batch)
+          })
+        self.evictStreams(now)
+class InferenceRequestHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  def log_message(self, format, *args):
+    pass
+  def sendJson(self, status, payload):
+    body = json.dumps(payload).encode()
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+  def do_POST(self):
+    try:
+      request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+      streamId = str(request['streamId'])
+      if self.path == "/predict":
+        future = self.server.batcher.submit(streamId, request['landmarks'])
+        try:
+          result = future.result()
+        except Exception as e:
+          self.sendJson(500, {'error': f"Classifier Failed: {e}"})
+          return
+        self.sendJson(200, result)
+      elif self.path == "/reset":
+        self.server.batcher.resetStream(streamId)
+        self.sendJson(200, {'streamId': streamId})
+      else:
+        self.sendJson(404, {'error': f"Unknown Path {self.path}"})
+    except (KeyError, TypeError, ValueError) as e:
+      self.sendJson(400, {'error': f"Bad Request: {e}"})
+    except Exception as e:
+      self.sendJson(500, {'error': f"{type(e).__name__}: {e}"})
+class InferenceServer(ThreadingHTTPServer):
+  daemon_threads = True
+  request_queue_size = 256
+  def __init__(self, address, batcher):
+    super().__init__(address, InferenceRequestHandler)
+    self.batcher = batcher
+def createServer(classifier, host="127.0.0.1", port=8765, maxBatchSize=64, maxLatencyMs=5.0, maxStreams=10000, streamIdleSec=300.0):
+  batcher = MicroBatcher(classifier, maxBatchSize, maxLatencyMs, maxStreams=maxStreams, streamIdleSec=streamIdleSec).start()
+  return InferenceServer((host, port), batcher)
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=8765)
+  parser.add_argument("--max-batch", type=int, default=64)
+  parser.add_argument("--max-latency-ms", type=float, default=5.0)
+  parser.add_argument("--max-streams", type=int, default=10000)
+  parser.add_argument("--stream-idle-sec", type=float, default=300.0)
+  args = parser.parse_args()
+  classifier = SignClassifier(*artifactPaths(Path(__file__).parent / "savedModels"))
+  server = createServer(classifier, args.host, args.port, args.max_batch, args.max_latency_ms, args.max_streams, args.stream_idle_sec)
+  print(f"Serving On http://{args.host}:{server.server_address[1]} (Max Batch {args.max_batch}, Max Latency {args.max_latency_ms}ms)")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  server.batcher.stop()
+  server.server_close()
\ No newline at end of file
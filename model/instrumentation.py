@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+import threading
+import time
+import numpy as np
+from bisect import bisect_left
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+class NullTimer:
+  def __enter__(self):
+    return self
+  def __exit__(self, *exc):
+    return False
+NULL_TIMER = NullTimer()
+class StageTimer:
+  __slots__ = ('histogram', 'start')
+  def __init__(self, histogram):
+    self.histogram = histogram
+  def __enter__(self):
+    self.start = time.perf_counter()
+    return self
+  def __exit__(self, *exc):
+    self.histogram.observe(time.perf_counter() - self.start)
+    return False
+class Histogram:
+  def __init__(self, windowSize=1000):
+    self.bucketCounts = [0] * (len(BUCKETS_MS) + 1)
+    self.count = 0
+    self.totalMs = 0.0
+    self.window = deque(maxlen=windowSize)
+    self.lock = threading.Lock()
+  def observe(self, seconds):
+    ms = seconds * 1000
+    with self.lock:
+      self.bucketCounts[bisect_left(BUCKETS_MS, ms)] += 1
+      self.count += 1
+      self.totalMs += ms
+      self.window.append(ms)
+  def snapshot(self):
+    with self.lock:
+      window = np.array(self.window)
+      bucketCounts = list(self.bucketCounts)
+      count, totalMs = self.count, self.totalMs
+    p50, p90, p99 = np.percentile(window, [50, 90, 99]) if len(window) else (0.0, 0.0, 0.0)
+    return {
+      'count': count,
+      'meanMs': totalMs / count if count else 0.0,
+      'p50Ms': float(p50),
+      'p90Ms': float(p90),
+      'p99Ms': float(p99),
+      'buckets': dict(zip([str(b) for b in BUCKETS_MS] + ['+Inf'], bucketCounts))
+    }
+class Instrumentation:
+  def __init__(self, enabled=True, windowSize=1000):
+    self.enabled = enabled
+    self.windowSize = windowSize
+    self.histograms = {}
+    self.counters = {}
+    self.lock = threading.Lock()
+  def histogram(self, stage):
+    histogram = self.histograms.get(stage)
+    if histogram is None:
+      with self.lock:
+        histogram = self.histograms.setdefault(stage, Histogram(self.windowSize))
+    return histogram
+  def timer(self, stage):
+    if not self.enabled:
+      return NULL_TIMER
+    return StageTimer(self.histogram(stage))
+  def increment(self, name, amount=1):
+    if not self.enabled:
+      return
+    with self.lock:
+      self.counters[name] = self.counters.get(name, 0) + amount
+  def snapshot(self):
+    with self.lock:
+      histograms = dict(self.histograms)
+      counters = dict(self.counters)
+    return {
+      'timestamp': time.time(),
+      'stages': {stage: histogram.snapshot() for stage, histogram in histograms.items()},
+      'counters': counters
+    }
+  def writeJson(self, path):
+    writeAtomic(path, lambda f: json.dump(self.snapshot(), f, indent=2))
+  def writeCsv(self, path):
+    snapshot = self.snapshot()
+    def write(f):
+      writer = csv.writer(f)
+      writer.writerow(['kind', 'name', 'count', 'meanMs', 'p50Ms', 'p90Ms', 'p99Ms'])
+      for stage, stats in snapshot['stages'].items():
+        writer.writerow(['stage', stage, stats['count'], f"{stats['meanMs']:.4f}", f"{stats['p50Ms']:.4f}", f"{stats['p90Ms']:.4f}", f"{stats['p99Ms']:.4f}"])
+      for name, value in snapshot['counters'].items():
+        writer.writerow(['counter', name, value, '', '', '', ''])
+    writeAtomic(path, write)
+  def prometheusText(self, prefix="sasl"):
+    snapshot = self.snapshot()
+    lines = [f"# TYPE {prefix}_stage_seconds histogram"]
+    for stage, stats in snapshot['stages'].items():
+      cumulative = 0
+      for bound, count in stats['buckets'].items():
+        cumulative += count
+        le = bound if bound == '+Inf' else f"{float(bound) / 1000:g}"
+        lines.append(f'{prefix}_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+      lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {stats["meanMs"] * stats["count"] / 1000:g}')
+      lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {stats["count"]}')
+    for name, value in snapshot['counters'].items():
+      lines.append(f"# TYPE {prefix}_{name}_total counter")
+      lines.append(f"{prefix}_{name}_total {value}")
+    return "\n".join(lines) + "\n"
+  def export(self, path):
+    if Path(path).suffix == ".csv":
+      self.writeCsv(path)
+    else:
+      self.writeJson(path)
+def writeAtomic(path, write):
+  path = Path(path)
+  tmpPath = path.with_name(path.name + ".tmp")
+  with open(tmpPath, "w", newline="") as f:
+    write(f)
+  os.replace(tmpPath, path)
+DISABLED = Instrumentation(enabled=False)
+class PeriodicExporter:
+  def __init__(self, instrumentation, path, interval=5.0):
+    self.instrumentation = instrumentation
+    self.path = path
+    self.interval = interval
+    self.stopEvent = threading.Event()
+    self.thread = threading.Thread(target=self.run, daemon=True)
+  def start(self):
+    self.thread.start()
+    return self
+  def run(self):
+    while not self.stopEvent.wait(self.interval):
+      self.instrumentation.export(self.path)
+  def stop(self):
+    self.stopEvent.set()
+    self.thread.join()
+    self.instrumentation.export(self.path)
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+  def log_message(self, format, *args):
+    pass
+  def do_GET(self):
+    if self.path != "/metrics":
+      self.send_error(404)
+      return
+    body = self.server.instrumentation.prometheusText().encode()
+    self.send_response(200)
+    self.send_header("Content-Type", "text/plain; version=0.0.4")
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+def serveMetrics(instrumentation, port=9464, host="127.0.0.1"):
+  server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+  server.daemon_threads = True
+  server.instrumentation = instrumentation
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
\ No newline at end of file
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import numpy as np
+from pathlib import Path
+def hashFile(path, chunkSize=1 << 20):
+  digest = hashlib.blake2b(digest_size=16)
+  with open(path, "rb") as f:
+    for block in iter(lambda: f.read(chunkSize), b""):
+      digest.update(block)
+  return digest.hexdigest()
+def cacheKey(modelPath, settings):
+  digest = hashlib.blake2b(digest_size=16)
+  digest.update(hashFile(modelPath).encode())
+  digest.update(json.dumps(settings, sort_keys=True).encode())
+  return digest.hexdigest()
+class LandmarkCache:
+  def __init__(self, cacheDir, modelPath, settings):
+    self.settings = dict(settings)
+    self.key = cacheKey(modelPath, self.settings)
+    self.cacheDir = Path(cacheDir) / self.key
+    self.cacheDir.mkdir(parents=True, exist_ok=True)
+    self.arrayPath = self.cacheDir / "landmarks.npy"
+    self.indexPath = self.cacheDir / "index.json"
+    self.index = {}
+    self.landmarks = None
+    if self.indexPath.exists() and self.arrayPath.exists():
+      with open(self.indexPath) as f:
+        self.index = json.load(f)['rows']
+      self.landmarks = np.load(self.arrayPath, mmap_mode='r+')
+    self.hits = 0
+    self.misses = 0
+  def __len__(self):
+    return len(self.index)
+  def __contains__(self, imageHash):
+    return imageHash in self.index
+  def get(self, imageHash):
+    row = self.index.get(imageHash)
+    if row is None:
+      self.misses += 1
+      return False, None
+    self.hits += 1
+    landmarks = np.array(self.landmarks[row])
+    if np.isnan(landmarks[0]):
+      return True, None
+    return True, landmarks
+  def put(self, imageHash, landmarks):
+    if imageHash in self.index:
+      return
+    row = len(self.index)
+    self.reserve(row + 1)
+    self.landmarks[row] = np.nan if landmarks is None else landmarks
+    self.index[imageHash] = row
+  def reserve(self, numRows):
+    capacity = 0 if self.landmarks is None else len(self.landmarks)
+    if numRows <= capacity:
+      return
+    newCapacity = max(numRows, capacity * 2, 1024)
+    tmpPath = self.cacheDir / "landmarks.tmp.npy"
+    grown = np.lib.format.open_memmap(tmpPath, mode='w+', dtype=np.float32, shape=(newCapacity, 63))
+    grown[:] = np.nan
+    if capacity:
+      grown[:capacity] = self.landmarks
+    grown.flush()
+    del grown
+    self.landmarks = None
+    os.replace(tmpPath, self.arrayPath)
+    self.landmarks = np.load(self.arrayPath, mmap_mode='r+')
+  def flush(self):
+    if self.landmarks is not None:
+      self.landmarks.flush()
+    tmpPath = self.cacheDir / "index.tmp.json"
+    with open(tmpPath, "w") as f:
+      json.dump({'settings': self.settings, 'rows': self.index}, f)
+    os.replace(tmpPath, self.indexPath)
\ No newline at end of file
@@ -0,0 +1,200 @@
+import argparse
+import json
+import shutil
+import sys
+import time
+import numpy as np
+from pathlib import Path
+from features import COMBINED_DIM, FEATURE_SCHEMA, extractCombinedFeatures, extractCombinedFeaturesBatch, featureSchemaHash, syntheticLandmarks
+from landmarkCache import hashFile
+from quantization import dequantizeOutput, quantizeInput
+from tfliteRuntime import createInterpreter
+BUNDLE_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+MODEL_FILE = "saslModel.tflite"
+SCALER_FILE = "scalerParams.json"
+LABEL_MAP_FILE = "labelMap.json"
+GOLDEN_FILE = "goldenVectors.json"
+TOLERANCES = {'features': 0.0, 'featuresBatch': 1e-5, 'scaledFeatures': 0.0, 'probabilities': 1e-5, 'doubleFeatures': 1e-4, 'doubleScaledFeatures': 1e-4}
+def goldenLandmarks(numSamples=32, seed=7):
+  landmarks = syntheticLandmarks(numSamples, seed)
+  degenerate = np.full((1, 63), 0.5, dtype=np.float32)
+  straight = np.zeros((21, 3), dtype=np.float32)
+  straight[:, 0] = 0.5
+  straight[:, 1] = np.linspace(0.9, 0.1, 21)
+  return np.concatenate([landmarks, degenerate, straight.reshape(1, 63)])
+def loadScalerParams(path):
+  if Path(path).suffix == ".json":
+    with open(path) as f:
+      scalerJson = json.load(f)
+    return {'mean': np.array(scalerJson['mean']), 'scale': np.array(scalerJson['scale']), 'folded': scalerJson.get('folded', False)}
+  return np.load(path, allow_pickle=True).item()
+def loadLabelMap(path):
+  if Path(path).suffix == ".json":
+    with open(path) as f:
+      return {name: int(idx) for idx, name in json.load(f).items()}
+  return np.load(path, allow_pickle=True).item()
+def scalerToJson(scalerParams):
+  return {
+    'mean': np.asarray(scalerParams['mean'], dtype=np.float64).tolist(),
+    'scale': np.asarray(scalerParams['scale'], dtype=np.float64).tolist(),
+    'folded': bool(scalerParams.get('folded', False))
+  }
+def saveScalerJson(scalerParams, path):
+  with open(path, "w") as f:
+    json.dump(scalerToJson(scalerParams), f)
+def saveLabelMapJson(labelMap, path):
+  with open(path, "w") as f:
+    json.dump({str(v): k for k, v in sorted(labelMap.items(), key=lambda item: item[1])}, f)
+def artifactPaths(modelDir):
+  modelDir = Path(modelDir)
+  formats = [(modelDir / SCALER_FILE, modelDir / LABEL_MAP_FILE), (modelDir / "scalerParams.npy", modelDir / "labelMap.npy")]
+  complete = [pair for pair in formats if all(path.exists() for path in pair)]
+  scalerParamsPath, labelMapPath = max(complete, key=lambda pair: max(path.stat().st_mtime for path in pair)) if complete else formats[1]
+  return modelDir / MODEL_FILE, scalerParamsPath, labelMapPath
+def scaleFeatures(features, scalerParams):
+  return ((np.asarray(features, dtype=np.float64) - np.asarray(scalerParams['mean'])) / np.asarray(scalerParams['scale'])).astype(np.float32)
+def runTflite(modelContent, scaledFeatures):
+  interpreter = createInterpreter(modelContent, len(scaledFeatures))
+  inputDetails = interpreter.get_input_details()[0]
+  outputDetails = interpreter.get_output_details()[0]
+  interpreter.set_tensor(inputDetails['index'], quantizeInput(scaledFeatures, inputDetails))
+  interpreter.invoke()
+  return dequantizeOutput(interpreter.get_tensor(outputDetails['index']), outputDetails)
+def tensorSpec(details):
+  scale, zeroPoint = details['quantization']
+  return {'dtype': np.dtype(details['dtype']).name, 'scale': float(scale), 'zeroPoint': int(zeroPoint)}
+def ioSpec(modelContent):
+  interpreter = createInterpreter(modelContent)
+  return {'input': tensorSpec(interpreter.get_input_details()[0]), 'output': tensorSpec(interpreter.get_output_details()[0])}
+def checkFloatIo(io):
+  for name, spec in io.items():
+    if spec['dtype'] != 'float32':
+      raise ValueError(f"Model {name.title()} Is {spec['dtype']}, The App Only Sends And Reads float32; Export A float32 I/O Model")
+def buildGoldenVectors(modelContent, scalerParams, landmarks):
+  features = np.stack([extractCombinedFeatures(lm) for lm in landmarks])
+  scaled = scaleFeatures(features, scalerParams)
+  probabilities = runTflite(modelContent, scaled)
+  return {
+    'featureSchemaHash': featureSchemaHash(),
+    'tolerances': TOLERANCES,
+    'vectors': [
+      {
+        'landmarks': lm.tolist(),
+        'features': f.tolist(),
+        'scaledFeatures': s.tolist(),
+        'probabilities': p.astype(np.float32).tolist()
+      }
+      for lm, f, s, p in zip(landmarks, features, scaled, probabilities)
+    ]
+  }
+def exportBundle(modelDir, outputDir, modelVersion=None, archivePath=None):
+  modelDir, outputDir = Path(modelDir), Path(outputDir)
+  outputDir.mkdir(parents=True, exist_ok=True)
+  with open(modelDir / MODEL_FILE, "rb") as f:
+    modelContent = f.read()
+  io = ioSpec(modelContent)
+  checkFloatIo(io)
+  _, scalerParamsPath, labelMapPath = artifactPaths(modelDir)
+  scalerParams = loadScalerParams(scalerParamsPath)
+  labelMap = loadLabelMap(labelMapPath)
+  scalerJson = scalerToJson(scalerParams)
+  if len(scalerJson['mean']) != COMBINED_DIM:
+    raise ValueError(f"Expected {COMBINED_DIM} Scaler Columns, Got {len(scalerJson['mean'])}")
+  if (modelDir / MODEL_FILE).resolve() != (outputDir / MODEL_FILE).resolve():
+    shutil.copyfile(modelDir / MODEL_FILE, outputDir / MODEL_FILE)
+  with open(outputDir / SCALER_FILE, "w") as f:
+    json.dump(scalerJson, f)
+  saveLabelMapJson(labelMap, outputDir / LABEL_MAP_FILE)
+  with open(outputDir / GOLDEN_FILE, "w") as f:
+    json.dump(buildGoldenVectors(modelContent, scalerJson, goldenLandmarks()), f)
+  files = [MODEL_FILE, SCALER_FILE, LABEL_MAP_FILE, GOLDEN_FILE]
+  manifest = {
+    'bundleVersion': BUNDLE_VERSION,
+    'modelVersion': modelVersion or hashFile(outputDir / MODEL_FILE)[:12],
+    'createdAt': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    'featureSchemaHash': featureSchemaHash(),
+    'featureSchema': FEATURE_SCHEMA,
+    'inputDim': COMBINED_DIM,
+    'numClasses': len(labelMap),
+    'io': io,
+    'files': {name: hashFile(outputDir / name) for name in files}
+  }
+  with open(outputDir / MANIFEST_FILE, "w") as f:
+    json.dump(manifest, f, indent=2)
+  print(f"Exported Bundle {manifest['modelVersion']} (Schema {manifest['featureSchemaHash'][:12]}) To {outputDir}")
+  if archivePath is not None:
+    archive = shutil.make_archive(str(Path(archivePath).with_suffix("")), "zip", outputDir)
+    print(f"Archived Bundle To {archive}")
+  return manifest
+def checkManifest(manifestPath):
+  with open(manifestPath) as f:
+    manifest = json.load(f)
+  if manifest.get('bundleVersion', 0) > BUNDLE_VERSION:
+    raise ValueError(f"Bundle Version {manifest['bundleVersion']} Is Newer Than Supported Version {BUNDLE_VERSION}")
+  if manifest.get('featureSchemaHash') != featureSchemaHash():
+    raise ValueError(f"Feature Schema Mismatch: Bundle {manifest.get('featureSchemaHash')}, Code {featureSchemaHash()}")
+  if 'io' in manifest:
+    checkFloatIo(manifest['io'])
+  return manifest
+def maxDifference(expected, actual):
+  return float(np.max(np.abs(np.asarray(expected, dtype=np.float64) - np.asarray(actual, dtype=np.float64))))
+def verifyBundle(bundleDir):
+  bundleDir = Path(bundleDir)
+  failures = []
+  try:
+    manifest = checkManifest(bundleDir / MANIFEST_FILE)
+  except ValueError as e:
+    return [str(e)]
+  for name, expectedHash in manifest['files'].items():
+    if hashFile(bundleDir / name) != expectedHash:
+      failures.append(f"{name} Hash Mismatch")
+  with open(bundleDir / GOLDEN_FILE) as f:
+    golden = json.load(f)
+  with open(bundleDir / SCALER_FILE) as f:
+    scalerParams = json.load(f)
+  with open(bundleDir / MODEL_FILE, "rb") as f:
+    modelContent = f.read()
+  try:
+    checkFloatIo(ioSpec(modelContent))
+  except ValueError as e:
+    failures.append(str(e))
+  vectors = golden['vectors']
+  tolerances = golden['tolerances']
+  landmarks = np.array([v['landmarks'] for v in vectors], dtype=np.float32)
+  expected = {key: np.array([v[key] for v in vectors], dtype=np.float32) for key in ('features', 'scaledFeatures', 'probabilities')}
+  actual = {
+    'features': np.stack([extractCombinedFeatures(lm) for lm in landmarks]),
+    'featuresBatch': extractCombinedFeaturesBatch(landmarks)
+  }
+  actual['scaledFeatures'] = scaleFeatures(actual['features'], scalerParams)
+  actual['probabilities'] = runTflite(modelContent, expected['scaledFeatures'])
+  print(f"{'Check':>16} {'Max Abs Diff':>13} {'Tolerance':>10}")
+  for name, values in actual.items():
+    key = 'features' if name == 'featuresBatch' else name
+    diff = maxDifference(expected[key], values)
+    tolerance = tolerances.get(name, TOLERANCES[name])
+    print(f"{name:>16} {diff:>13.3g} {tolerance:>10.3g}")
+    if diff > tolerance:
+      failures.append(f"{name} Differs From Golden Vectors By {diff:.3g}")
+  return failures
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  subparsers = parser.add_subparsers(dest="command", required=True)
+  exportParser = subparsers.add_parser("export")
+  exportParser.add_argument("--model-dir", type=Path, default=Path(__file__).parent / "savedModels")
+  exportParser.add_argument("--output", type=Path, default=Path(__file__).parent.parent / "assets" / "models")
+  exportParser.add_argument("--version", default=None)
+  exportParser.add_argument("--archive", type=Path, default=None)
+  verifyParser = subparsers.add_parser("verify")
+  verifyParser.add_argument("--bundle-dir", type=Path, default=Path(__file__).parent.parent / "assets" / "models")
+  args = parser.parse_args()
+  if args.command == "export":
+    exportBundle(args.model_dir, args.output, args.version, args.archive)
+  else:
+    failures = verifyBundle(args.bundle_dir)
+    for failure in failures:
+      print(f"FAILED: {failure}")
+    if failures:
+      sys.exit(1)
+    print("Bundle Matches Golden Vectors")
\ No newline at end of file
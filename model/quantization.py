@@ -0,0 +1,12 @@
+import numpy as np
+def quantizeInput(features, inputDetails):
+  if inputDetails['dtype'] == np.float32:
+    return np.asarray(features, dtype=np.float32)
+  scale, zeroPoint = inputDetails['quantization']
+  info = np.iinfo(inputDetails['dtype'])
+  return np.clip(np.round(features / scale + zeroPoint), info.min, info.max).astype(inputDetails['dtype'])
+def dequantizeOutput(output, outputDetails):
+  if outputDetails['dtype'] == np.float32:
+    return output
+  scale, zeroPoint = outputDetails['quantization']
+  return (output.astype(np.float32) - zeroPoint) * scale
\ No newline at end of file
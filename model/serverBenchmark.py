@@ -0,0 +1,76 @@
+import argparse
+import http.client
+import json
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from features import syntheticLandmarks
+from modelBundle import artifactPaths
+from inference import SignClassifier
+from inferenceServer import createServer
+def runClient(port, streamId, landmarks, stopAt, latencies):
+  connection = http.client.HTTPConnection("127.0.0.1", port)
+  i = 0
+  while time.time() < stopAt:
+    body = json.dumps({'streamId': streamId, 'landmarks': landmarks[i % len(landmarks)].tolist()})
+    start = time.perf_counter()
+    connection.request("POST", "/predict", body, {"Content-Type": "application/json"})
+    connection.getresponse().read()
+    latencies.append(time.perf_counter() - start)
+    i += 1
+  connection.close()
+def runClientGroup(port, streamIds, stopAt):
+  landmarks = syntheticLandmarks(256)
+  latencies = [[] for _ in streamIds]
+  clients = [
+    threading.Thread(target=runClient, args=(port, streamId, landmarks, stopAt, streamLatencies))
+    for streamId, streamLatencies in zip(streamIds, latencies)
+  ]
+  for client in clients:
+    client.start()
+  for client in clients:
+    client.join()
+  return [l for streamLatencies in latencies for l in streamLatencies]
+def benchmarkBatchSize(classifier, maxBatchSize, numStreams=64, durationSec=5.0, maxLatencyMs=5.0, numProcesses=None):
+  server = createServer(classifier, port=0, maxBatchSize=maxBatchSize, maxLatencyMs=maxLatencyMs)
+  serverThread = threading.Thread(target=server.serve_forever, daemon=True)
+  serverThread.start()
+  port = server.server_address[1]
+  numProcesses = min(numStreams, numProcesses or max(1, (os.cpu_count() or 2) - 1))
+  streamIds = [f"stream{i}" for i in range(numStreams)]
+  stopAt = time.time() + durationSec
+  with ProcessPoolExecutor(max_workers=numProcesses) as executor:
+    groups = [executor.submit(runClientGroup, port, streamIds[i::numProcesses], stopAt) for i in range(numProcesses)]
+    allLatencies = np.array([l for group in groups for l in group.result()]) * 1000
+  server.shutdown()
+  server.batcher.stop()
+  server.server_close()
+  return {
+    'maxBatchSize': maxBatchSize,
+    'numStreams': numStreams,
+    'requests': len(allLatencies),
+    'throughput': len(allLatencies) / durationSec,
+    'meanBatchSize': float(np.mean(server.batcher.batchSizes)) if server.batcher.batchSizes else 0.0,
+    'p50Ms': float(np.percentile(allLatencies, 50)),
+    'p99Ms': float(np.percentile(allLatencies, 99))
+  }
+def runBenchmark(classifier, batchSizes=(1, 8, 32, 64), numStreams=64, durationSec=5.0, maxLatencyMs=5.0):
+  results = []
+  print(f"{'Max Batch':>9} {'Mean Batch':>10} {'Req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+  for maxBatchSize in batchSizes:
+    result = benchmarkBatchSize(classifier, maxBatchSize, numStreams, durationSec, maxLatencyMs)
+    results.append(result)
+    print(f"{maxBatchSize:>9} {result['meanBatchSize']:>10.1f} {result['throughput']:>9.0f} {result['p50Ms']:>8.2f} {result['p99Ms']:>8.2f}")
+  return results
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--streams", type=int, default=64)
+  parser.add_argument("--duration", type=float, default=5.0)
+  parser.add_argument("--max-latency-ms", type=float, default=5.0)
+  parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+  args = parser.parse_args()
+  classifier = SignClassifier(*artifactPaths(Path(__file__).parent / "savedModels"))
+  runBenchmark(classifier, args.batch_sizes, args.streams, args.duration, args.max_latency_ms)
\ No newline at end of file
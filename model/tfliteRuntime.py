@@ -0,0 +1,48 @@
+import hashlib
+import threading
+import numpy as np
+interpreterClass = None
+threadCache = threading.local()
+cacheGeneration = 0
+def loadInterpreterClass():
+  global interpreterClass
+  if interpreterClass is None:
+    try:
+      from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+      try:
+        from tflite_runtime.interpreter import Interpreter
+      except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    interpreterClass = Interpreter
+  return interpreterClass
+def runtimeName():
+  return loadInterpreterClass().__module__.split(".")[0]
+def modelKey(modelContent):
+  return hashlib.blake2b(modelContent, digest_size=16).hexdigest()
+def createInterpreter(modelContent, batchSize=None):
+  interpreter = loadInterpreterClass()(model_content=modelContent)
+  inputDetails = interpreter.get_input_details()[0]
+  if batchSize is not None and batchSize != inputDetails['shape'][0]:
+    interpreter.resize_tensor_input(inputDetails['index'], [batchSize, inputDetails['shape'][1]])
+  interpreter.allocate_tensors()
+  return interpreter
+def warmInterpreter(interpreter):
+  inputDetails = interpreter.get_input_details()[0]
+  interpreter.set_tensor(inputDetails['index'], np.zeros(inputDetails['shape'], dtype=inputDetails['dtype']))
+  interpreter.invoke()
+  return interpreter
+def sharedInterpreter(modelContent, batchSize, key=None):
+  if getattr(threadCache, 'generation', None) != cacheGeneration:
+    threadCache.interpreters = {}
+    threadCache.generation = cacheGeneration
+  cacheKey = (key or modelKey(modelContent), batchSize)
+  interpreter = threadCache.interpreters.get(cacheKey)
+  if interpreter is None:
+    interpreter = threadCache.interpreters[cacheKey] = warmInterpreter(createInterpreter(modelContent, batchSize))
+  return interpreter
+def clearInterpreterCache():
+  global cacheGeneration
+  cacheGeneration += 1
+  threadCache.interpreters = {}
\ No newline at end of file
@@ -1,5 +1,8 @@
 import warnings
+import argparse
+import hashlib
 import joblib
+import json
 import os
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, VotingClassifier
@@ -7,67 +10,135 @@ from sklearn.metrics import accuracy_score, classification_report
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.neural_network import MLPClassifier
-from sklearn.preprocessing import StandardScaler
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.svm import SVC
+from sklearn.utils import Bunch
+from joblib import Parallel, delayed
 from pathlib import Path
+from approxKernel import ApproxKernelClassifier
+from augmentation import streamAugmentedBatches
+from features import extractCombinedFeaturesBatch
+from cascade import buildCascade
+from dataset import featureColumns, loadDataset, loadLandmarkSet
+from modelBundle import LABEL_MAP_FILE, saveLabelMapJson
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings('ignore')
 def loadData(dataPath):
-  rawFeatures = np.load(dataPath / "rawFeatures.npy")
-  angleFeatures = np.load(dataPath / "angleFeatures.npy")
-  distanceFeatures = np.load(dataPath / "distanceFeatures.npy")
-  combinedFeatures = np.load(dataPath / "combinedFeatures.npy")
-  labels = np.load(dataPath / "labels.npy")
-  labelMap = np.load(dataPath / "labelMap.npy", allow_pickle=True).item()
+  combinedFeatures, labels, header = loadDataset(dataPath)
   return {
-    'raw': rawFeatures,
-    'angles': angleFeatures,
-    'distances': distanceFeatures,
+    'raw': featureColumns(combinedFeatures, 'raw'),
+    'angles': featureColumns(combinedFeatures, 'angles'),
+    'distances': featureColumns(combinedFeatures, 'distances'),
     'combined': combinedFeatures
-  }, labels, labelMap
-def trainEnsemble(dataPath, outputPath):
-  features, labels, labelMap = loadData(dataPath)
-  numClasses = len(labelMap)
-  print(f"Loaded {len(labels)} Samples, {numClasses} Classes")
-  print(f"Raw: {features['raw'].shape[1]} features")
-  print(f"Angles: {features['angles'].shape[1]} features")
-  print(f"Distances: {features['distances'].shape[1]} features")
-  print(f"Combined: {features['combined'].shape[1]} features")
-  xTrain, xTest, yTrain, yTest = train_test_split(
-    features['combined'], labels, test_size=0.2, random_state=42, stratify=labels
-  )
+  }, labels, header['labelMap']
+def loadLandmarks(dataPath):
+  landmarks, labels, header = loadLandmarkSet(dataPath)
+  return landmarks, labels, header['labelMap']
+def streamedTrainSet(landmarks, labels, numAugmentations, seed=42):
+  batches = list(streamAugmentedBatches(landmarks, labels, 4096, numAugmentations, seed=seed, epochs=1))
+  return np.concatenate([x for x, _ in batches]), np.concatenate([y for _, y in batches])
+MEMBER_NAMES = {
+  'rf': "Random Forest",
+  'lr': "Logistic Regression",
+  'mlp': "MLP Neural Network",
+  'svm': "SVM (RBF Kernel)",
+  'approxSvm': "Approximate RBF (Nystroem + SGD)"
+}
+def createMembers(svmMode='exact'):
+  members = {
+    'rf': RandomForestClassifier(n_estimators=300, max_depth=40, min_samples_split=2, n_jobs=-1, random_state=42, verbose=0),
+    'lr': LogisticRegression(max_iter=1000, solver='lbfgs', n_jobs=-1, random_state=42),
+    'mlp': MLPClassifier(hidden_layer_sizes=(256, 128, 64), max_iter=500, early_stopping=True, random_state=42, verbose=0)
+  }
+  if svmMode == 'exact':
+    members['svm'] = SVC(kernel='rbf', probability=True, random_state=42, C=10, gamma='scale')
+  elif svmMode == 'approx':
+    members['approxSvm'] = ApproxKernelClassifier(method='nystroem')
+  else:
+    raise ValueError(f"Unknown SVM Mode {svmMode}, Expected 'exact' Or 'approx'")
+  return members
+def hashTrainingData(x, y):
+  digest = hashlib.blake2b(digest_size=16)
+  digest.update(np.ascontiguousarray(x).view(np.uint8))
+  digest.update(np.ascontiguousarray(y).view(np.uint8))
+  return digest.hexdigest()
+def memberCacheKey(name, estimator, dataHash):
+  params = json.dumps(estimator.get_params(deep=True), sort_keys=True, default=repr)
+  digest = hashlib.blake2b(digest_size=16)
+  digest.update(f"{name}:{type(estimator).__name__}:{params}:{dataHash}".encode())
+  return digest.hexdigest()
+def fitMember(estimator, x, y):
+  return estimator.fit(x, y)
+def fitMembers(members, x, y, cacheDir, numJobs=None):
+  cacheDir = Path(cacheDir)
+  cacheDir.mkdir(parents=True, exist_ok=True)
+  dataHash = hashTrainingData(x, y)
+  cachePaths = {name: cacheDir / f"{name}-{memberCacheKey(name, estimator, dataHash)}.joblib" for name, estimator in members.items()}
+  fitted = {name: joblib.load(path) for name, path in cachePaths.items() if path.exists()}
+  toFit = [name for name in members if name not in fitted]
+  if fitted:
+    print(f"Loaded Cached Members: {', '.join(MEMBER_NAMES.get(name, name) for name in fitted)}")
+  if toFit:
+    print(f"Fitting {', '.join(MEMBER_NAMES.get(name, name) for name in toFit)} In Parallel")
+    results = Parallel(n_jobs=numJobs or len(toFit))(delayed(fitMember)(members[name], x, y) for name in toFit)
+    for name, estimator in zip(toFit, results):
+      joblib.dump(estimator, cachePaths[name])
+      fitted[name] = estimator
+  pruneMemberCache(cacheDir, cachePaths)
+  return {name: fitted[name] for name in members}
+def pruneMemberCache(cacheDir, cachePaths):
+  for path in Path(cacheDir).glob("*.joblib"):
+    name = path.stem.rsplit("-", 1)[0]
+    if name in cachePaths and path != cachePaths[name]:
+      path.unlink()
+      print(f"Removed Stale Cached Member {path.name}")
+def assembleEnsemble(members, y):
+  ensemble = VotingClassifier(estimators=list(members.items()), voting='soft', n_jobs=-1)
+  ensemble.le_ = LabelEncoder().fit(y)
+  ensemble.classes_ = ensemble.le_.classes_
+  ensemble.estimators_ = list(members.values())
+  ensemble.named_estimators_ = Bunch(**members)
+  return ensemble
+def trainEnsemble(dataPath, outputPath, numAugmentations=0, numJobs=None, svmMode='exact'):
+  if numAugmentations > 0:
+    landmarks, labels, labelMap = loadLandmarks(dataPath)
+    numClasses = len(labelMap)
+    print(f"Loaded {len(labels)} Landmark Samples, {numClasses} Classes, Streaming {numAugmentations} Augmentations")
+    lmTrain, lmTest, yTrain, yTest = train_test_split(
+      landmarks, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    lmTrain, lmVal, yTrain, yVal = train_test_split(
+      lmTrain, yTrain, test_size=0.1, random_state=42, stratify=yTrain
+    )
+    xTrain, yTrain = streamedTrainSet(lmTrain, yTrain, numAugmentations)
+    xVal = extractCombinedFeaturesBatch(lmVal)
+    xTest = extractCombinedFeaturesBatch(lmTest)
+  else:
+    features, labels, labelMap = loadData(dataPath)
+    numClasses = len(labelMap)
+    print(f"Loaded {len(labels)} Samples, {numClasses} Classes")
+    print(f"Raw: {features['raw'].shape[1]} features")
+    print(f"Angles: {features['angles'].shape[1]} features")
+    print(f"Distances: {features['distances'].shape[1]} features")
+    print(f"Combined: {features['combined'].shape[1]} features")
+    xTrain, xTest, yTrain, yTest = train_test_split(
+      features['combined'], labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    xTrain, xVal, yTrain, yVal = train_test_split(
+      xTrain, yTrain, test_size=0.1, random_state=42, stratify=yTrain
+    )
   scaler = StandardScaler()
   xTrainScaled = scaler.fit_transform(xTrain)
+  xValScaled = scaler.transform(xVal)
   xTestScaled = scaler.transform(xTest)
   print("\nTraining Individual Models...")
-  print("1. Random Forest")
-  rf = RandomForestClassifier(n_estimators=300, max_depth=40, min_samples_split=2, n_jobs=-1, random_state=42, verbose=0)
-  rf.fit(xTrainScaled, yTrain)
-  rfAcc = accuracy_score(yTest, rf.predict(xTestScaled))
-  print(f"Random Forest Accuracy: {rfAcc:.4f}")
-  print("2. Logistic Regression")
-  lr = LogisticRegression(max_iter=1000, solver='lbfgs', n_jobs=-1, random_state=42)
-  lr.fit(xTrainScaled, yTrain)
-  lrAcc = accuracy_score(yTest, lr.predict(xTestScaled))
-  print(f"Logistic Regression Accuracy: {lrAcc:.4f}")
-  print("3. MLP Neural Network")
-  mlp = MLPClassifier(hidden_layer_sizes=(256, 128, 64), max_iter=500, early_stopping=True, random_state=42, verbose=0)
-  mlp.fit(xTrainScaled, yTrain)
-  mlpAcc = accuracy_score(yTest, mlp.predict(xTestScaled))
-  print(f"MLP Accuracy: {mlpAcc:.4f}")
-  print("4. SVM (RBF Kernel)")
-  svm = SVC(kernel='rbf', probability=True, random_state=42, C=10, gamma='scale')
-  svm.fit(xTrainScaled, yTrain)
-  svmAcc = accuracy_score(yTest, svm.predict(xTestScaled))
-  print(f"SVM Accuracy: {svmAcc:.4f}")
+  members = fitMembers(createMembers(svmMode), xTrainScaled, yTrain, Path(outputPath) / "memberCache", numJobs)
+  for i, (name, estimator) in enumerate(members.items(), 1):
+    memberAcc = accuracy_score(yTest, estimator.predict(xTestScaled))
+    print(f"{i}. {MEMBER_NAMES[name]} Accuracy: {memberAcc:.4f}")
   print("\n5. Creating Voting Ensemble")
-  ensemble = VotingClassifier(
-    estimators=[('rf', rf), ('lr', lr), ('mlp', mlp), ('svm', svm)],
-    voting='soft',
-    n_jobs=-1
-  )
-  ensemble.fit(xTrainScaled, yTrain)
+  ensemble = assembleEnsemble(members, yTrain)
   yPred = ensemble.predict(xTestScaled)
   ensembleAcc = accuracy_score(yTest, yPred)
   print(f"\n=== ENSEMBLE ACCURACY: {ensembleAcc:.4f} ===")
@@ -81,10 +152,17 @@ def trainEnsemble(dataPath, outputPath):
   outputPath.mkdir(parents=True, exist_ok=True)
   joblib.dump(ensemble, outputPath / "ensemble.joblib")
   joblib.dump(scaler, outputPath / "scaler.joblib")
+  print("\n6. Building Early-Exit Cascade")
+  buildCascade(ensemble, xValScaled, yVal, xTestScaled, yTest, outputPath)
   np.save(outputPath / "labelMap.npy", labelMap)
+  saveLabelMapJson(labelMap, outputPath / LABEL_MAP_FILE)
   print(f"\nModels Saved To {outputPath}")
   return ensemble, scaler, ensembleAcc
 if __name__ == "__main__":
   dataPath = Path(__file__).parent / "data" / "processed"
   outputPath = Path(__file__).parent / "savedModels"
-  trainEnsemble(dataPath, outputPath)
\ No newline at end of file
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--augmentations", type=int, default=0)
+  parser.add_argument("--svm", choices=['exact', 'approx'], default='exact')
+  args = parser.parse_args()
+  trainEnsemble(dataPath, outputPath, numAugmentations=args.augmentations, svmMode=args.svm)
\ No newline at end of file
@@ -1,6 +1,10 @@
 import warnings
+import argparse
 import joblib
+import hashlib
+import json
 import os
+import time
 import tensorflow as tf
 import numpy as np
 from sklearn.model_selection import train_test_split
@@ -8,14 +12,20 @@ from sklearn.preprocessing import StandardScaler
 from tensorflow.keras import layers
 from tensorflow import keras
 from pathlib import Path
+from augmentation import augmentDataset, epochSize, streamAugmentedBatches
+from features import extractCombinedFeaturesBatch
+from dataset import loadDataset, loadHeader, loadLandmarkSet
+from quantization import dequantizeOutput, quantizeInput
+from modelBundle import LABEL_MAP_FILE, SCALER_FILE, saveLabelMapJson, saveScalerJson
 os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
 warnings.filterwarnings('ignore')
 def loadData(dataPath):
-  combinedFeatures = np.load(dataPath / "combinedFeatures.npy")
-  labels = np.load(dataPath / "labels.npy")
-  labelMap = np.load(dataPath / "labelMap.npy", allow_pickle=True).item()
-  return combinedFeatures, labels, labelMap
+  combinedFeatures, labels, header = loadDataset(dataPath)
+  return combinedFeatures, labels, header['labelMap']
+def loadLandmarks(dataPath):
+  landmarks, labels, header = loadLandmarkSet(dataPath)
+  return landmarks, labels, header['labelMap']
 def createMlpModel(inputShape, numClasses):
   model = keras.Sequential([
     layers.Input(shape=(inputShape,)),
@@ -35,22 +45,86 @@ def createMlpModel(inputShape, numClasses):
     metrics=['accuracy']
   )
   return model
-def trainTfliteModel(dataPath, outputPath, epochs=100, batchSize=64):
-  features, labels, labelMap = loadData(dataPath)
+QUANTIZATION_VARIANTS = ['float32', 'dynamic', 'float16', 'int8']
+def foldScalerIntoModel(model, scaler):
+  inputs = keras.Input(shape=(len(scaler.mean_),))
+  normalized = layers.Normalization(mean=scaler.mean_, variance=np.square(scaler.scale_), name='scaler')(inputs)
+  return keras.Model(inputs, model(normalized))
+def convertModel(model, quantization='dynamic', calibrationData=None, numCalibrationSamples=500):
+  if quantization not in QUANTIZATION_VARIANTS:
+    raise ValueError(f"Unknown Quantization {quantization}, Expected One Of {QUANTIZATION_VARIANTS}")
+  converter = tf.lite.TFLiteConverter.from_keras_model(model)
+  if quantization != 'float32':
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+  if quantization == 'float16':
+    converter.target_spec.supported_types = [tf.float16]
+  elif quantization == 'int8':
+    calibrationIdx = np.random.default_rng(42).permutation(len(calibrationData))[:numCalibrationSamples]
+    calibration = np.asarray(calibrationData[np.sort(calibrationIdx)], dtype=np.float32)
+    converter.representative_dataset = lambda: ([row[None]] for row in calibration)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+  return converter.convert()
+def evaluateTflite(tfliteModel, x, y, numLatencySamples=500):
+  x = np.asarray(x, dtype=np.float32)
+  interpreter = tf.lite.Interpreter(model_content=tfliteModel)
+  inputDetails = interpreter.get_input_details()[0]
+  outputDetails = interpreter.get_output_details()[0]
+  interpreter.resize_tensor_input(inputDetails['index'], [len(x), x.shape[1]])
+  interpreter.allocate_tensors()
+  interpreter.set_tensor(inputDetails['index'], quantizeInput(x, inputDetails))
+  interpreter.invoke()
+  probas = dequantizeOutput(interpreter.get_tensor(outputDetails['index']), outputDetails)
+  accuracy = float(np.mean(np.argmax(probas, axis=1) == y))
+  interpreter = tf.lite.Interpreter(model_content=tfliteModel)
+  interpreter.allocate_tensors()
+  samples = quantizeInput(x[:numLatencySamples], inputDetails)
+  start = time.perf_counter()
+  for row in samples:
+    interpreter.set_tensor(inputDetails['index'], row[None])
+    interpreter.invoke()
+    interpreter.get_tensor(outputDetails['index'])
+  latencyUs = (time.perf_counter() - start) / len(samples) * 1e6
+  return {'accuracy': accuracy, 'latencyUs': latencyUs, 'sizeKb': len(tfliteModel) / 1024}
+def compareQuantizations(model, calibrationData, xTest, yTest, outputPath):
+  report = {}
+  models = {}
+  print(f"{'Variant':>8} {'Accuracy':>9} {'Latency us':>11} {'Size KB':>8}")
+  for variant in QUANTIZATION_VARIANTS:
+    models[variant] = convertModel(model, variant, calibrationData)
+    with open(outputPath / f"saslModel_{variant}.tflite", "wb") as f:
+      f.write(models[variant])
+    report[variant] = evaluateTflite(models[variant], xTest, yTest)
+    print(f"{variant:>8} {report[variant]['accuracy']:>9.4f} {report[variant]['latencyUs']:>11.1f} {report[variant]['sizeKb']:>8.1f}")
+  with open(outputPath / "quantizationReport.json", "w") as f:
+    json.dump(report, f, indent=2)
+  return report, models
+def selectQuantization(report, accuracyBudget=0.01):
+  bestAccuracy = max(stats['accuracy'] for stats in report.values())
+  eligible = [variant for variant, stats in report.items() if stats['accuracy'] >= bestAccuracy - accuracyBudget]
+  return min(eligible, key=lambda variant: report[variant]['latencyUs'])
+def trainTfliteModel(dataPath, outputPath, epochs=100, batchSize=64, numAugmentations=0, foldScaler=False, quantization='dynamic', accuracyBudget=0.01):
+  if numAugmentations > 0:
+    landmarks, labels, labelMap = loadLandmarks(dataPath)
+    print(f"Loaded {len(landmarks)} Landmark Samples, Streaming {numAugmentations} Augmentations Per Epoch")
+    lmTrain, lmTest, yTrain, yTest = train_test_split(
+      landmarks, labels, test_size=0.2, random_state=42, stratify=labels
+    )
+    xTrain = extractCombinedFeaturesBatch(augmentDataset(lmTrain, yTrain, 1, np.random.default_rng(42))[0])
+    xTest = extractCombinedFeaturesBatch(lmTest)
+  else:
+    features, labels, labelMap = loadData(dataPath)
+    print(f"Loaded {len(features)} Samples, {features.shape[1]} Features, {len(labelMap)} Classes")
+    xTrain, xTest, yTrain, yTest = train_test_split(
+      features, labels, test_size=0.2, random_state=42, stratify=labels
+    )
   numClasses = len(labelMap)
-  inputShape = features.shape[1]
-  print(f"Loaded {len(features)} Samples, {inputShape} Features, {numClasses} Classes")
-  xTrain, xTest, yTrain, yTest = train_test_split(
-    features, labels, test_size=0.2, random_state=42, stratify=labels
-  )
+  inputShape = xTrain.shape[1]
   scaler = StandardScaler()
   xTrainScaled = scaler.fit_transform(xTrain)
   xTestScaled = scaler.transform(xTest)
-  scalerParams = {
-    'mean': scaler.mean_,
-    'scale': scaler.scale_
-  }
-  np.save(outputPath / "scalerParams.npy", scalerParams)
+  saveScalerParams(scaler, foldScaler, outputPath)
   model = createMlpModel(inputShape, numClasses)
   checkpoint = keras.callbacks.ModelCheckpoint(
     str(outputPath / "bestModel.keras"),
@@ -59,26 +133,186 @@ def trainTfliteModel(dataPath, outputPath, epochs=100, batchSize=64):
     mode='max',
     verbose=1
   )
-  history = model.fit(
-    xTrainScaled, yTrain,
-    validation_data=(xTestScaled, yTest),
-    epochs=epochs,
-    batch_size=batchSize,
-    callbacks=[checkpoint],
-    verbose=1
-  )
+  if numAugmentations > 0:
+    trainStream = streamAugmentedBatches(
+      lmTrain, yTrain, batchSize, numAugmentations,
+      transform=lambda x: scaler.transform(x).astype(np.float32)
+    )
+    history = model.fit(
+      trainStream,
+      steps_per_epoch=-(-epochSize(len(lmTrain), numAugmentations) // batchSize),
+      validation_data=(xTestScaled, yTest),
+      epochs=epochs,
+      callbacks=[checkpoint],
+      verbose=1
+    )
+  else:
+    history = model.fit(
+      xTrainScaled, yTrain,
+      validation_data=(xTestScaled, yTest),
+      epochs=epochs,
+      batch_size=batchSize,
+      callbacks=[checkpoint],
+      verbose=1
+    )
   model = keras.models.load_model(str(outputPath / "bestModel.keras"))
   testLoss, testAcc = model.evaluate(xTestScaled, yTest, verbose=0)
   print(f"Test Accuracy: {testAcc:.4f}")
-  converter = tf.lite.TFLiteConverter.from_keras_model(model)
-  converter.optimizations = [tf.lite.Optimize.DEFAULT]
-  tfliteModel = converter.convert()
+  exportTflite(model, scaler, xTrain, xTest, yTest, labelMap, outputPath, foldScaler, quantization, accuracyBudget)
+  return model, testAcc
+def saveScalerParams(scaler, foldScaler, outputPath):
+  scalerParams = {
+    'mean': scaler.mean_,
+    'scale': scaler.scale_
+  }
+  if foldScaler:
+    scalerParams = {
+      'mean': np.zeros_like(scaler.mean_),
+      'scale': np.ones_like(scaler.scale_),
+      'folded': True
+    }
+  np.save(outputPath / "scalerParams.npy", scalerParams)
+  saveScalerJson(scalerParams, outputPath / SCALER_FILE)
+def exportTflite(model, scaler, xTrain, xTest, yTest, labelMap, outputPath, foldScaler=False, quantization='dynamic', accuracyBudget=0.01):
+  exportModel = foldScalerIntoModel(model, scaler) if foldScaler else model
+  calibrationData = xTrain if foldScaler else scaler.transform(xTrain)
+  if quantization == 'auto':
+    report, models = compareQuantizations(exportModel, calibrationData, xTest if foldScaler else scaler.transform(xTest), yTest, outputPath)
+    quantization = selectQuantization(report, accuracyBudget)
+    print(f"Selected {quantization} (Fastest Within {accuracyBudget:.1%} Of Best Accuracy)")
+    tfliteModel = models[quantization]
+  else:
+    tfliteModel = convertModel(exportModel, quantization, calibrationData)
   with open(outputPath / "saslModel.tflite", "wb") as f:
     f.write(tfliteModel)
   np.save(outputPath / "labelMap.npy", labelMap)
+  saveLabelMapJson(labelMap, outputPath / LABEL_MAP_FILE)
   print(f"TFLite Model Saved To {outputPath / 'saslModel.tflite'}")
+  if quantization == 'int8':
+    print("int8 Model Takes int8 Input And Output, modelBundle.py export Will Refuse It Until The App Quantizes Its Inputs")
+def splitShards(start, stop, shardSize):
+  return [slice(shardStart, min(shardStart + shardSize, stop)) for shardStart in range(start, stop, shardSize)]
+def shuffledCopy(dataPath, features, labels, order, chunkSize=65536):
+  dataPath = Path(dataPath)
+  sourceStat = (dataPath / loadHeader(dataPath)['files']['features']).stat()
+  digest = hashlib.blake2b(digest_size=8)
+  digest.update(order.tobytes())
+  digest.update(f"{sourceStat.st_size}-{sourceStat.st_mtime_ns}".encode())
+  cacheDir = dataPath / "shuffled" / digest.hexdigest()
+  featuresPath, labelsPath = cacheDir / "features.npy", cacheDir / "labels.npy"
+  if not (featuresPath.exists() and labelsPath.exists()):
+    print(f"Writing Shuffled Copy Of {len(order)} Samples To {cacheDir}")
+    cacheDir.mkdir(parents=True, exist_ok=True)
+    for path, source in ((featuresPath, features), (labelsPath, labels)):
+      tmpPath = path.with_suffix(".tmp.npy")
+      target = np.lib.format.open_memmap(tmpPath, mode='w+', dtype=source.dtype, shape=(len(order),) + source.shape[1:])
+      for start in range(0, len(order), chunkSize):
+        rows = order[start:start+chunkSize]
+        sortIdx = np.argsort(rows)
+        target[start + sortIdx] = source[rows[sortIdx]]
+      target.flush()
+      del target
+      os.replace(tmpPath, path)
+  return np.load(featuresPath, mmap_mode='r'), np.load(labelsPath, mmap_mode='r')
+def welfordScaler(features, shards):
+  count = 0
+  mean = np.zeros(features.shape[1], dtype=np.float64)
+  m2 = np.zeros(features.shape[1], dtype=np.float64)
+  for shard in shards:
+    chunk = np.asarray(features[shard], dtype=np.float64)
+    chunkMean = chunk.mean(axis=0)
+    delta = chunkMean - mean
+    total = count + len(chunk)
+    mean += delta * len(chunk) / total
+    m2 += np.square(chunk - chunkMean).sum(axis=0) + np.square(delta) * count * len(chunk) / total
+    count = total
+  scaler = StandardScaler()
+  scaler.n_features_in_ = features.shape[1]
+  scaler.n_samples_seen_ = count
+  scaler.mean_ = mean
+  scaler.var_ = m2 / count
+  scale = np.sqrt(scaler.var_)
+  scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+  scaler.scale_ = scale
+  return scaler
+def streamFeatureDataset(features, labels, shards, scaler, batchSize, shuffle=True, seed=42):
+  numFeatures = features.shape[1]
+  mean = scaler.mean_.astype(np.float32)
+  scale = scaler.scale_.astype(np.float32)
+  def loadShard(shardIdx):
+    rows = shards[shardIdx]
+    return np.asarray(features[rows], dtype=np.float32), np.asarray(labels[rows], dtype=np.int32)
+  def readShard(shardIdx):
+    x, y = tf.numpy_function(loadShard, [shardIdx], [tf.float32, tf.int32])
+    return tf.ensure_shape(x, [None, numFeatures]), tf.ensure_shape(y, [None])
+  dataset = tf.data.Dataset.range(len(shards))
+  if shuffle:
+    dataset = dataset.shuffle(len(shards), seed=seed, reshuffle_each_iteration=True)
+  dataset = dataset.map(readShard, num_parallel_calls=tf.data.AUTOTUNE, deterministic=not shuffle).unbatch()
+  if shuffle:
+    dataset = dataset.shuffle(batchSize * 64, seed=seed, reshuffle_each_iteration=True)
+  dataset = dataset.batch(batchSize).map(lambda x, y: ((x - mean) / scale, y), num_parallel_calls=tf.data.AUTOTUNE)
+  return dataset.prefetch(tf.data.AUTOTUNE)
+def trainTfliteStreaming(dataPath, outputPath, epochs=100, batchSize=64, shardSize=65536, foldScaler=False, quantization='dynamic', accuracyBudget=0.01, numEvalSamples=20000):
+  features, labels, header = loadDataset(dataPath)
+  labelMap = header['labelMap']
+  print(f"Streaming {len(features)} Samples, {features.shape[1]} Features, {len(labelMap)} Classes In Shards Of {shardSize}")
+  trainIdx, testIdx = train_test_split(
+    np.arange(len(features)), test_size=0.2, random_state=42, stratify=np.asarray(labels)
+  )
+  features, labels = shuffledCopy(dataPath, features, labels, np.concatenate([trainIdx, testIdx]), shardSize)
+  numTrain = len(trainIdx)
+  trainShards = splitShards(0, numTrain, shardSize)
+  testShards = splitShards(numTrain, len(features), shardSize)
+  scaler = welfordScaler(features, trainShards)
+  saveScalerParams(scaler, foldScaler, outputPath)
+  trainStream = streamFeatureDataset(features, labels, trainShards, scaler, batchSize)
+  testStream = streamFeatureDataset(features, labels, testShards, scaler, batchSize * 16, shuffle=False)
+  bestModelPath = outputPath / "bestModel.keras"
+  backupDir = outputPath / "trainBackup"
+  bestAccuracy = None
+  if backupDir.exists() and bestModelPath.exists():
+    bestAccuracy = keras.models.load_model(str(bestModelPath)).evaluate(testStream, verbose=0)[1]
+    print(f"Resuming From {backupDir} (Best Val Accuracy {bestAccuracy:.4f})")
+  checkpoint = keras.callbacks.ModelCheckpoint(
+    str(bestModelPath),
+    monitor='val_accuracy',
+    save_best_only=True,
+    mode='max',
+    initial_value_threshold=bestAccuracy,
+    verbose=1
+  )
+  backup = keras.callbacks.BackupAndRestore(str(backupDir))
+  model = createMlpModel(features.shape[1], len(labelMap))
+  model.fit(trainStream, validation_data=testStream, epochs=epochs, callbacks=[backup, checkpoint], verbose=1)
+  model = keras.models.load_model(str(bestModelPath))
+  testLoss, testAcc = model.evaluate(testStream, verbose=0)
+  print(f"Test Accuracy: {testAcc:.4f}")
+  evalRows = slice(numTrain, min(numTrain + numEvalSamples, len(features)))
+  exportTflite(
+    model, scaler, np.asarray(features[:min(numEvalSamples, numTrain)]), np.asarray(features[evalRows]), np.asarray(labels[evalRows]),
+    labelMap, outputPath, foldScaler, quantization, accuracyBudget
+  )
   return model, testAcc
 if __name__ == "__main__":
   dataPath = Path(__file__).parent / "data" / "processed"
   outputPath = Path(__file__).parent / "savedModels"
-  trainTfliteModel(dataPath, outputPath)
\ No newline at end of file
+  parser = argparse.ArgumentParser()
+  parser.add_argument("--epochs", type=int, default=100)
+  parser.add_argument("--augmentations", type=int, default=0)
+  parser.add_argument("--fold-scaler", action="store_true")
+  parser.add_argument("--quantization", choices=QUANTIZATION_VARIANTS + ['auto'], default='dynamic')
+  parser.add_argument("--accuracy-budget", type=float, default=0.01)
+  parser.add_argument("--streaming", action="store_true")
+  parser.add_argument("--shard-size", type=int, default=65536)
+  args = parser.parse_args()
+  if args.streaming:
+    trainTfliteStreaming(
+      dataPath, outputPath, epochs=args.epochs, shardSize=args.shard_size,
+      foldScaler=args.fold_scaler, quantization=args.quantization, accuracyBudget=args.accuracy_budget
+    )
+  else:
+    trainTfliteModel(
+      dataPath, outputPath, epochs=args.epochs, numAugmentations=args.augmentations,
+      foldScaler=args.fold_scaler, quantization=args.quantization, accuracyBudget=args.accuracy_budget
+    )
\ No newline at end of file
@@ -0,0 +1,41 @@
+import 'dart:convert';
+import 'dart:io';
+import 'package:flutter_test/flutter_test.dart';
+import 'package:sasl/services/featureExtractor.dart';
+void main() {
+  final golden = jsonDecode(File('assets/models/goldenVectors.json').readAsStringSync());
+  final manifest = jsonDecode(File('assets/models/manifest.json').readAsStringSync());
+  final scaler = jsonDecode(File('assets/models/scalerParams.json').readAsStringSync());
+  final tolerances = golden['tolerances'] as Map<String, dynamic>;
+  final vectors = golden['vectors'] as List<dynamic>;
+  test('Golden Vectors Match The Bundled Feature Schema', () {
+    expect(golden['featureSchemaHash'], manifest['featureSchemaHash']);
+    expect(manifest['inputDim'], 113);
+    expect(vectors, isNotEmpty);
+  });
+  test('FeatureExtractor Matches Golden Features', () {
+    final tolerance = (tolerances['doubleFeatures'] as num).toDouble();
+    for (int v = 0; v < vectors.length; v++) {
+      final landmarks = List<double>.from((vectors[v]['landmarks'] as List).map((x) => (x as num).toDouble()));
+      final expected = List<double>.from((vectors[v]['features'] as List).map((x) => (x as num).toDouble()));
+      final features = FeatureExtractor.extractCombinedFeatures(landmarks);
+      expect(features.length, expected.length);
+      for (int i = 0; i < features.length; i++) {
+        expect(features[i], closeTo(expected[i], tolerance), reason: 'Vector $v, Feature $i');
+      }
+    }
+  });
+  test('Scaled Features Match Golden Scaled Features', () {
+    final tolerance = (tolerances['doubleScaledFeatures'] as num).toDouble();
+    final mean = List<double>.from((scaler['mean'] as List).map((x) => (x as num).toDouble()));
+    final scale = List<double>.from((scaler['scale'] as List).map((x) => (x as num).toDouble()));
+    for (int v = 0; v < vectors.length; v++) {
+      final landmarks = List<double>.from((vectors[v]['landmarks'] as List).map((x) => (x as num).toDouble()));
+      final expected = List<double>.from((vectors[v]['scaledFeatures'] as List).map((x) => (x as num).toDouble()));
+      final features = FeatureExtractor.extractCombinedFeatures(landmarks);
+      for (int i = 0; i < features.length; i++) {
+        expect((features[i] - mean[i]) / scale[i], closeTo(expected[i], tolerance), reason: 'Vector $v, Feature $i');
+      }
+    }
+  });
+}
\ No newline at end of file